@@ -6,6 +6,7 @@ https://github.com/ludeeus/hass_nuki_bt
 
 from __future__ import annotations
 import logging
+import time
 from asyncio import CancelledError, TimeoutError
 from bleak import BleakError
 
@@ -14,11 +15,15 @@ from homeassistant.const import Platform, CONF_NAME, CONF_PIN
 from homeassistant.core import HomeAssistant
 from homeassistant.components import bluetooth
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.typing import ConfigType
 
 
 from pyNukiBT import NukiDevice, NukiConst
 
 from .const import (
+    CONF_ACTIVITY_PREFETCH,
     CONF_APP_ID,
     CONF_AUTH_ID,
     CONF_DEVICE_ADDRESS,
@@ -26,9 +31,22 @@ from .const import (
     CONF_PRIVATE_KEY,
     CONF_PUBLIC_KEY,
     CONF_CLIENT_TYPE,
+    CONF_OPTIMISTIC_LOCK_ACTIONS,
+    CONF_POLL_INTERVAL,
+    CONF_RSSI_INTERVAL,
+    CONF_RSSI_PER_ADVERTISEMENT,
+    CONF_STALE_AFTER,
+    CONF_UNAVAILABLE_AFTER,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_RSSI_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNAVAILABLE_AFTER,
     DOMAIN,
 )
 from .coordinator import NukiDataUpdateCoordinator
+from .crypto import apply_key_material, async_forget_key_material, async_get_key_material
+from .services import async_setup_services
+from .statistics import async_remove_activity
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
@@ -36,9 +54,63 @@ PLATFORMS: list[Platform] = [
     Platform.SENSOR,
     Platform.BUTTON,
 ]
+# Only openers have a doorbell.
+OPENER_PLATFORMS: list[Platform] = [*PLATFORMS, Platform.EVENT]
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the domain services."""
+    async_setup_services(hass)
+    return True
+
+
+def _connection_data(entry: ConfigEntry) -> tuple:
+    """Return the entry data that can only be changed by reconnecting."""
+    return tuple(
+        entry.data.get(key)
+        for key in (
+            CONF_DEVICE_ADDRESS,
+            CONF_AUTH_ID,
+            CONF_DEVICE_PUBLIC_KEY,
+            CONF_PUBLIC_KEY,
+            CONF_PRIVATE_KEY,
+            CONF_APP_ID,
+        )
+    )
+
+
+def _platforms(device: NukiDevice) -> list[Platform]:
+    if device.device_type == NukiConst.NukiDeviceType.OPENER:
+        return OPENER_PLATFORMS
+    return PLATFORMS
+
+
+def _client_type(entry: ConfigEntry) -> NukiConst.NukiClientType:
+    if entry.data.get(CONF_CLIENT_TYPE) == "App":
+        return NukiConst.NukiClientType.APP
+    return NukiConst.NukiClientType.BRIDGE
+
+
+def _coordinator_options(entry: ConfigEntry) -> dict:
+    """Return the coordinator settings that can be changed without reconnecting."""
+    return {
+        "device_name": entry.data.get(CONF_NAME),
+        "security_pin": None if entry.data.get(CONF_PIN) is None else int(entry.data[CONF_PIN]),
+        "rssi_interval": entry.options.get(CONF_RSSI_INTERVAL, DEFAULT_RSSI_INTERVAL),
+        "rssi_per_advertisement": entry.options.get(CONF_RSSI_PER_ADVERTISEMENT, False),
+        "optimistic_lock_actions": entry.options.get(CONF_OPTIMISTIC_LOCK_ACTIONS, False),
+        "poll_interval": entry.options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL),
+        "stale_after": entry.options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+        "unavailable_after": entry.options.get(
+            CONF_UNAVAILABLE_AFTER, DEFAULT_UNAVAILABLE_AFTER
+        ),
+        "activity_prefetch": entry.options.get(CONF_ACTIVITY_PREFETCH, True),
+    }
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -55,25 +127,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if not ble_device:
         raise ConfigEntryNotReady(f"Could not find Nuki with address {address}")
 
-    if entry.data.get(CONF_CLIENT_TYPE) == "App":
-        client_type = NukiConst.NukiClientType.APP
-    else:
-        client_type = NukiConst.NukiClientType.BRIDGE
-
+    options = _coordinator_options(entry)
+    key_setup_start = time.perf_counter()
+    keys, keys_cached = async_get_key_material(hass, entry)
+    key_setup_time = time.perf_counter() - key_setup_start
     device = NukiDevice(
         address=entry.data[CONF_DEVICE_ADDRESS],
-        auth_id=bytes.fromhex(entry.data[CONF_AUTH_ID]),
-        nuki_public_key=bytes.fromhex(entry.data[CONF_DEVICE_PUBLIC_KEY]),
-        bridge_public_key=bytes.fromhex(entry.data[CONF_PUBLIC_KEY]),
-        bridge_private_key=bytes.fromhex(entry.data[CONF_PRIVATE_KEY]),
+        auth_id=keys.auth_id,
+        # The shared key is taken from the cache instead of derived again.
+        nuki_public_key=None,
+        bridge_public_key=keys.bridge_public_key,
+        bridge_private_key=keys.bridge_private_key,
         app_id=int(entry.data[CONF_APP_ID]),
-        client_type=client_type,
+        client_type=_client_type(entry),
         name="HomeAssistant",
         ble_device=ble_device,
         get_ble_device=lambda addr: bluetooth.async_ble_device_from_address(
             hass, addr, connectable=True
         ),
     )
+    key_setup_start = time.perf_counter()
+    apply_key_material(device, keys)
+    key_setup_time += time.perf_counter() - key_setup_start
     try:
         await device.connect()
     except (BleakError, CancelledError, TimeoutError) as ex:
@@ -86,10 +161,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         ble_device=ble_device,
         device=device,
         base_unique_id=entry.unique_id,
-        device_name=entry.data.get(CONF_NAME),
         connectable=True,
-        security_pin=None if entry.data.get(CONF_PIN) is None else int(entry.data[CONF_PIN]),
+        **options,
     )
+    coordinator.connection_data = _connection_data(entry)
+    await coordinator.activity.async_load(hass, entry.entry_id)
+
+    coordinator.session_stats.key_setup_time = key_setup_time
+    coordinator.session_stats.key_derive_time = keys.setup_time
+    coordinator.session_stats.key_cache_hit = keys_cached
 
     if not await coordinator.async_wait_ready():
         raise ConfigEntryNotReady(f"{address} is not advertising state")
@@ -104,20 +184,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
     # await coordinator.async_config_entry_first_refresh()
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    await hass.config_entries.async_forward_entry_setups(entry, _platforms(device))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
-    if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+    coordinator: NukiDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    if unloaded := await hass.config_entries.async_unload_platforms(
+        entry, _platforms(coordinator.device)
+    ):
         hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.recording is not None:
+            await coordinator.async_stop_recording()
     return unloaded
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the cached key material and activity history of a removed entry."""
+    async_forget_key_material(hass, entry.entry_id)
+    await async_remove_activity(hass, entry.entry_id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options in place, reloading only for new credentials."""
+    coordinator: NukiDataUpdateCoordinator | None = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is None or coordinator.connection_data != _connection_data(entry):
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+    previous_name = coordinator.device_name
+    coordinator.async_apply_options(**_coordinator_options(entry))
+    if coordinator.device_name != previous_name:
+        device_registry = dr.async_get(hass)
+        if device := device_registry.async_get_device(
+            connections={(dr.CONNECTION_BLUETOOTH, coordinator.address)}
+        ):
+            device_registry.async_update_device(device.id, name=coordinator.device_name)
@@ -24,8 +24,10 @@ class NukiBinarySensorEntityDescription(BinarySensorEntityDescription):
     """A class that describes nuki sensor entities."""
 
     info_function: Callable | None = (
-        lambda slf: slf.device.keyturner_state[slf.sensor] != 0
+        lambda slf: slf.coordinator.snapshot.state[slf.sensor] != 0
     )
+    # Whether the sensor applies to a device, None if it applies to all.
+    exists_function: Callable | None = None
 
 SENSOR_TYPES_COMMON: list[NukiBinarySensorEntityDescription] = [
     NukiBinarySensorEntityDescription(
@@ -33,14 +35,14 @@ SENSOR_TYPES_COMMON: list[NukiBinarySensorEntityDescription] = [
         name="Battery Critical",
         device_class=BinarySensorDeviceClass.BATTERY,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.is_battery_critical,
+        info_function=lambda slf: slf.coordinator.snapshot.battery_critical,
     ),
     NukiBinarySensorEntityDescription(
         key="battery_charging",
         name="Battery Charging",
         device_class=BinarySensorDeviceClass.BATTERY_CHARGING,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.is_battery_charging,
+        info_function=lambda slf: slf.coordinator.snapshot.battery_charging,
     ),
 ]
 SENSOR_TYPES_OPENER: list[NukiBinarySensorEntityDescription] = SENSOR_TYPES_COMMON
@@ -50,7 +52,10 @@ SENSOR_TYPES_LOCK: list[NukiBinarySensorEntityDescription] = SENSOR_TYPES_COMMON
         name="Keypad Battery Critical",
         device_class=BinarySensorDeviceClass.BATTERY,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.keyturner_state[slf.sensor] & 0x2,
+        info_function=lambda slf: slf.coordinator.snapshot.state[slf.sensor] & 0x2,
+        # Only skipped when the config says there is no keypad at all.
+        exists_function=lambda device: "has_keypad" not in device.config
+            or bool(device.config["has_keypad"] or device.config.get("has_keypad_v2")),
     ),
     NukiBinarySensorEntityDescription(
         key="nightmode_active",
@@ -63,8 +68,7 @@ SENSOR_TYPES_LOCK: list[NukiBinarySensorEntityDescription] = SENSOR_TYPES_COMMON
         key="was_autounlock",
         name="Last action was autounlock",
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: flags & 0x1 == 1 if ((data:=slf.coordinator.last_nuki_log_entry.get("data")) and (flags := data.get("flags"))) \
-            else False,
+        info_function=lambda slf: slf.coordinator.snapshot.was_autounlock,
         entity_registry_enabled_default=False,
     ),
 ]
@@ -73,12 +77,23 @@ SENSOR_TYPES_LOCK: list[NukiBinarySensorEntityDescription] = SENSOR_TYPES_COMMON
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Nuki sensor based on a config entry."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        [NukiBinarySensor(coordinator, sensor) for sensor in supported_sensors(coordinator.device)]
+    )
+    return True
 
-    if coordinator.device.device_type == NukiConst.NukiDeviceType.OPENER:
-        async_add_entities([NukiBinarySensor(coordinator, sensor) for sensor in SENSOR_TYPES_OPENER])
+
+def supported_sensors(device) -> list[NukiBinarySensorEntityDescription]:
+    """Return the binary sensors that apply to a device."""
+    if device.device_type == NukiConst.NukiDeviceType.OPENER:
+        descriptions = SENSOR_TYPES_OPENER
     else:
-        async_add_entities([NukiBinarySensor(coordinator, sensor) for sensor in SENSOR_TYPES_LOCK])
-    return True
+        descriptions = SENSOR_TYPES_LOCK
+    return [
+        description
+        for description in descriptions
+        if description.exists_function is None or description.exists_function(device)
+    ]
 
 
 class NukiBinarySensor(NukiEntity, BinarySensorEntity):
@@ -92,7 +107,6 @@ class NukiBinarySensor(NukiEntity, BinarySensorEntity):
         self._attr_unique_id = f"{coordinator.base_unique_id}-{sensor.key}"
         self.entity_description = sensor
         self._info_function = sensor.info_function
-        self._async_update_attrs()
 
     def _async_update_attrs(self) -> None:
         """Update the entity attributes."""
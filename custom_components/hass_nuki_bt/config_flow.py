@@ -1,17 +1,23 @@
 """Adds config flow for Nuki."""
 
+import asyncio
 import random
+import time
 from typing import Any
 import re
 
+import async_timeout
+from bleak import BleakError
 from nacl.public import PrivateKey
 
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.components import bluetooth
 from homeassistant.const import CONF_NAME, CONF_PIN
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.selector import (
+    SelectOptionDict,
     SelectSelector,
     SelectSelectorConfig,
     SelectSelectorMode,
@@ -20,6 +26,7 @@ from homeassistant.helpers.selector import (
 from pyNukiBT import NukiConst, NukiDevice, NukiErrorException
 
 from .const import (
+    CONF_ACTIVITY_PREFETCH,
     CONF_APP_ID,
     CONF_AUTH_ID,
     CONF_DEVICE_ADDRESS,
@@ -27,10 +34,24 @@ from .const import (
     CONF_PRIVATE_KEY,
     CONF_PUBLIC_KEY,
     CONF_CLIENT_TYPE,
+    CONF_OPTIMISTIC_LOCK_ACTIONS,
+    CONF_POLL_INTERVAL,
+    CONF_RSSI_INTERVAL,
+    CONF_RSSI_PER_ADVERTISEMENT,
+    CONF_STALE_AFTER,
+    CONF_UNAVAILABLE_AFTER,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_RSSI_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNAVAILABLE_AFTER,
     DOMAIN,
     LOGGER,
 )
 
+# Seconds a connection may take before pairing through that path is pointless.
+CONNECT_TIMEOUT = 15
+MANUAL_ADDRESS = "manual"
+
 
 class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Nuki."""
@@ -43,6 +64,19 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._data: dict = {}
+        self._discovered: dict[str, bluetooth.BluetoothServiceInfoBleak] = {}
+        self._device: NukiDevice | None = None
+        self._keypair: PrivateKey | None = None
+        self._app_id: int | None = None
+        self._probe: dict[str, str] | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return NukiOptionsFlowHandler(config_entry)
 
     async def async_step_bluetooth(
         self, discovery_info: bluetooth.BluetoothServiceInfoBleak
@@ -64,15 +98,66 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the chose method step."""
+        if self._probe is None:
+            self._probe = await self._async_probe()
         return self.async_show_menu(
             step_id="choose_method",
             menu_options={"pair", "manual"},
             description_placeholders={
                 "name": self._data[CONF_NAME],
                 "address": self._data[CONF_DEVICE_ADDRESS],
+                **self._probe,
             },
         )
 
+    async def _async_probe(self) -> dict[str, str]:
+        """Try a time bounded connection and describe the best path to the device."""
+        paths = ranked_paths(self.hass, self._data[CONF_DEVICE_ADDRESS])
+        if not paths:
+            return {"path": "-", "probe": "not advertising"}
+        rssi, source = paths[0]
+        path = f"{source} ({rssi} dBm)"
+        device = self._pairing_device()
+        start = time.monotonic()
+        try:
+            async with async_timeout.timeout(CONNECT_TIMEOUT):
+                await device.connect()
+        except (BleakError, asyncio.TimeoutError) as ex:
+            LOGGER.debug("Connection probe failed: %s", ex)
+            probe = f"failed within {CONNECT_TIMEOUT} s"
+        else:
+            probe = f"{time.monotonic() - start:.1f} s"
+        await device.disconnect()
+        return {"path": path, "probe": probe}
+
+    def _pairing_device(self) -> NukiDevice:
+        """Return the device used to probe and pair, with a new key pair."""
+        if self._device is not None:
+            return self._device
+        self._keypair = keypair = PrivateKey.generate()
+        self._app_id = random.getrandbits(32)
+        if self._data[CONF_CLIENT_TYPE] == "App":
+            client_type = NukiConst.NukiClientType.APP
+        else:
+            client_type = NukiConst.NukiClientType.BRIDGE
+        self._device = NukiDevice(
+            address=self._data[CONF_DEVICE_ADDRESS],
+            auth_id=None,
+            nuki_public_key=None,
+            bridge_public_key=bytes(keypair.public_key),
+            bridge_private_key=bytes(keypair),
+            app_id=self._app_id,
+            name="HomeAssistant",
+            client_type=client_type,
+            ble_device=bluetooth.async_ble_device_from_address(
+                self.hass, self._data[CONF_DEVICE_ADDRESS], connectable=True
+            ),
+            get_ble_device=lambda addr: bluetooth.async_ble_device_from_address(
+                self.hass, addr, connectable=True
+            ),
+        )
+        return self._device
+
     async def async_step_step1(
         self,
         user_input: dict | None = None,
@@ -117,8 +202,50 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self,
         user_input: dict | None = None,
     ) -> FlowResult:
-        """Handle a user flow."""
-        return await self.async_step_step1(user_input)
+        """Handle a user flow, offering the advertising devices strongest first."""
+        if user_input is not None:
+            address = user_input[CONF_DEVICE_ADDRESS]
+            if address == MANUAL_ADDRESS:
+                return await self.async_step_step1()
+            await self.async_set_unique_id(format_unique_id(address))
+            self._abort_if_unique_id_configured()
+            self._data[CONF_DEVICE_ADDRESS] = address.upper()
+            self._data[CONF_NAME] = self._discovered[address].name
+            return await self.async_step_step1()
+
+        current_ids = self._async_current_ids()
+        ranked = []
+        for info in bluetooth.async_discovered_service_info(self.hass, connectable=True):
+            if (
+                not (info.name or "").startswith("Nuki_")
+                or format_unique_id(info.address) in current_ids
+                or info.address in self._discovered
+                or not (paths := ranked_paths(self.hass, info.address))
+            ):
+                continue
+            self._discovered[info.address] = info
+            ranked.append((paths[0], info))
+        if not ranked:
+            return await self.async_step_step1()
+        ranked.sort(key=lambda item: item[0][0], reverse=True)
+        options = [
+            SelectOptionDict(
+                value=info.address,
+                label=f"{info.name} ({info.address}) {rssi} dBm via {source}",
+            )
+            for (rssi, source), info in ranked
+        ]
+        options.append(SelectOptionDict(value=MANUAL_ADDRESS, label="Other device"))
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_DEVICE_ADDRESS): SelectSelector(
+                        SelectSelectorConfig(options=options, mode=SelectSelectorMode.LIST)
+                    ),
+                }
+            ),
+        )
 
     async def async_step_pair(
         self,
@@ -130,34 +257,16 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if CONF_CLIENT_TYPE not in self._data or CONF_DEVICE_ADDRESS not in self._data:
             return await self.async_step_step1(user_input)
 
-        app_id = random.getrandbits(32)
-        keypair = PrivateKey.generate()
-        public_key = bytes(keypair.public_key)
-        private_key = bytes(keypair)
-
-        if self._data[CONF_CLIENT_TYPE] == "App":
-            client_type = NukiConst.NukiClientType.APP
-        else:
-            client_type = NukiConst.NukiClientType.BRIDGE
-        ble_device = bluetooth.async_ble_device_from_address(
-            self.hass, self._data[CONF_DEVICE_ADDRESS], connectable=True
-        )
-
-        device = NukiDevice(
-            address=self._data[CONF_DEVICE_ADDRESS],
-            auth_id=None,
-            nuki_public_key=None,
-            bridge_public_key=public_key,
-            bridge_private_key=private_key,
-            app_id=app_id,
-            name="HomeAssistant",
-            client_type=client_type,
-            ble_device=ble_device,
-            get_ble_device=lambda addr: bluetooth.async_ble_device_from_address(
-                self.hass, addr, connectable=True
-            ),
-        )
-        await device.connect()
+        device = self._pairing_device()
+        try:
+            async with async_timeout.timeout(CONNECT_TIMEOUT):
+                await device.connect()
+        except (BleakError, asyncio.TimeoutError) as ex:
+            LOGGER.error("Could not connect to %s: %s", self._data[CONF_DEVICE_ADDRESS], ex)
+            return self.async_show_form(
+                step_id="pair",
+                errors={"base": "connection"},
+            )
         try:
             ret = await device.pair(None if self._data.get(CONF_PIN) is None else int(self._data[CONF_PIN]))
         except NukiErrorException as ex:
@@ -170,9 +279,9 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
         self._data[CONF_AUTH_ID] = ret["auth_id"].hex()
         self._data[CONF_DEVICE_PUBLIC_KEY] = ret["nuki_public_key"].hex()
-        self._data[CONF_PUBLIC_KEY] = public_key.hex()
-        self._data[CONF_PRIVATE_KEY] = private_key.hex()
-        self._data[CONF_APP_ID] = str(app_id)
+        self._data[CONF_PUBLIC_KEY] = bytes(self._keypair.public_key).hex()
+        self._data[CONF_PRIVATE_KEY] = bytes(self._keypair).hex()
+        self._data[CONF_APP_ID] = str(self._app_id)
 
         await device.disconnect()
 
@@ -232,11 +341,102 @@ class NukiFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class NukiOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for Nuki."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options.
+
+        Name and PIN belong to the entry data and are written back there;
+        everything else is stored as options. None of them need a new
+        connection, so they are applied to the running device.
+        """
+        errors = {}
+        if user_input is not None:
+            if (pin := user_input.get(CONF_PIN)) is not None and not pin.isdigit():
+                errors[CONF_PIN] = "invalid_pin"
+            else:
+                data = {
+                    key: value
+                    for key, value in self._entry.data.items()
+                    if key not in (CONF_NAME, CONF_PIN)
+                }
+                for key in (CONF_NAME, CONF_PIN):
+                    if (value := user_input.pop(key, None)) is not None:
+                        data[key] = value
+                self.hass.config_entries.async_update_entry(
+                    self._entry, title=data[CONF_NAME], data=data
+                )
+                return self.async_create_entry(title="", data=user_input)
+        data = self._entry.data
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_NAME, default=data.get(CONF_NAME)): str,
+                    vol.Optional(
+                        CONF_PIN,
+                        description={"suggested_value": data.get(CONF_PIN)},
+                    ): str,  # use str to allow leading zeros
+                    vol.Required(
+                        CONF_POLL_INTERVAL,
+                        default=options.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                    vol.Required(
+                        CONF_STALE_AFTER,
+                        default=options.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                    vol.Required(
+                        CONF_UNAVAILABLE_AFTER,
+                        default=options.get(CONF_UNAVAILABLE_AFTER, DEFAULT_UNAVAILABLE_AFTER),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                    vol.Required(
+                        CONF_RSSI_INTERVAL,
+                        default=options.get(CONF_RSSI_INTERVAL, DEFAULT_RSSI_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Required(
+                        CONF_RSSI_PER_ADVERTISEMENT,
+                        default=options.get(CONF_RSSI_PER_ADVERTISEMENT, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_OPTIMISTIC_LOCK_ACTIONS,
+                        default=options.get(CONF_OPTIMISTIC_LOCK_ACTIONS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_ACTIVITY_PREFETCH,
+                        default=options.get(CONF_ACTIVITY_PREFETCH, True),
+                    ): bool,
+                }
+            ),
+            errors=errors,
+        )
+
+
 def format_unique_id(address: str) -> str:
     """Format the unique ID from address."""
     return address.replace(":", "").lower()
 
 
+def ranked_paths(hass, address: str) -> list[tuple[int, str]]:
+    """Return RSSI and adapter or proxy name of every path to a device, strongest first."""
+    return sorted(
+        (
+            (scanner_device.advertisement.rssi, scanner_device.scanner.name)
+            for scanner_device in bluetooth.async_scanner_devices_by_address(
+                hass, address, connectable=True
+            )
+        ),
+        reverse=True,
+    )
+
+
 def validate_address(address: str) -> bool:
     """Validate address format."""
     r = re.compile("^(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}$")
@@ -7,6 +7,10 @@ NAME = "Nuki BT"
 # Keep in sync with services.yaml.
 DOMAIN = "hass_nuki_bt"
 MANUFACTURER = "nuki"
+# Fired when an opener detects a doorbell ring.
+EVENT_RING = f"{DOMAIN}_ring"
+# Fired once the opener log confirms or refutes a ring without ring to open.
+EVENT_RING_CONFIRMED = f"{DOMAIN}_ring_confirmed"
 VERSION = "0.0.0"
 ATTRIBUTION = "Data provided by http://jsonplaceholder.typicode.com/"
 
@@ -18,3 +22,18 @@ CONF_PUBLIC_KEY = "public_key"
 CONF_DEVICE_PUBLIC_KEY = "device_public_key"
 CONF_APP_ID = "app_id"
 CONF_CLIENT_TYPE = "client_type"
+
+# options
+CONF_RSSI_INTERVAL = "rssi_interval"
+CONF_RSSI_PER_ADVERTISEMENT = "rssi_per_advertisement"
+CONF_OPTIMISTIC_LOCK_ACTIONS = "optimistic_lock_actions"
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_STALE_AFTER = "stale_after"
+CONF_ACTIVITY_PREFETCH = "activity_prefetch"
+CONF_UNAVAILABLE_AFTER = "unavailable_after"
+DEFAULT_RSSI_INTERVAL = 300
+# Only poll when the device asks for it.
+DEFAULT_POLL_INTERVAL = 0
+# Seconds without an advertisement or state read, 0 disables.
+DEFAULT_STALE_AFTER = 300
+DEFAULT_UNAVAILABLE_AFTER = 1800
@@ -4,18 +4,56 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
-from typing import TYPE_CHECKING
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any
 
 import async_timeout
 
 from bleak import BleakError
+from construct import Container
 
 from homeassistant.components import bluetooth
 from homeassistant.components.bluetooth.active_update_coordinator import (
     ActiveBluetoothDataUpdateCoordinator,
 )
 from homeassistant.core import HomeAssistant, callback
-from pyNukiBT import NukiDevice, NukiConst
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_time_change,
+    async_track_time_interval,
+    async_track_utc_time_change,
+)
+from homeassistant.util import dt as dt_util
+from pyNukiBT import (
+    NukiConst,
+    NukiDevice,
+    NukiErrorException,
+    NukiLockConst,
+    NukiOpenerConst,
+)
+
+from .const import (
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_RSSI_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNAVAILABLE_AFTER,
+    EVENT_RING,
+    EVENT_RING_CONFIRMED,
+)
+from .recording import NukiTrafficRecording
+from .statistics import (
+    STATISTIC_DOOR,
+    STATISTIC_KEYPAD,
+    STATISTIC_LOCK,
+    STATISTIC_UNLOCK,
+    ActivityHistogram,
+    NukiLongTermStatistics,
+    WindowStatistics,
+    deep_getsizeof,
+)
 
 if TYPE_CHECKING:
     from bleak.backends.device import BLEDevice
@@ -23,6 +61,167 @@ if TYPE_CHECKING:
 _LOGGER = logging.getLogger(__name__)
 
 DEVICE_STARTUP_TIMEOUT = 300
+# Longest expected motor run; after it, an unconfirmed lock action is refreshed.
+LOCK_ACTION_COMPLETION_TIMEOUT = 30
+# How much longer the poll interval is outside of predicted activity windows.
+POLL_INTERVAL_BACKOFF = 4
+# A state read this recent makes a prefetch unnecessary.
+PREFETCH_MIN_STATE_AGE = 600
+WATCHDOG_INTERVAL = timedelta(seconds=30)
+# Seconds an operation may take, including one retry over another adapter or proxy.
+FAILOVER_DEADLINE = 20
+# Seconds the first attempt may take when another adapter or proxy could retry it.
+# pyNukiBT's own send retries and response timeouts easily exceed the deadline.
+FAILOVER_FIRST_ATTEMPT = 12
+# Lock actions that return to their starting state by themselves, so a state
+# read can't tell whether they were carried out. They are never sent twice.
+MOMENTARY_LOCK_ACTIONS = (
+    NukiLockConst.LockAction.UNLATCH,
+    NukiLockConst.LockAction.LOCK_N_GO,
+    NukiLockConst.LockAction.LOCK_N_GO_UNLATCH,
+    NukiLockConst.LockAction.FOB_ACTION_1,
+    NukiLockConst.LockAction.FOB_ACTION_2,
+    NukiLockConst.LockAction.FOB_ACTION_3,
+    NukiOpenerConst.LockAction.ELECTRIC_STRIKE_ACTUATION,
+)
+# Keyturner state fields that change when a lock action is carried out.
+LOCK_ACTION_STATE_FIELDS = (
+    "lock_state",
+    "last_lock_action",
+    "last_lock_action_trigger",
+    "last_lock_action_completion_status",
+)
+
+# Work that can be pipelined into a single device session, in execution order.
+SESSION_LOCK_ACTION = "lock_action"
+SESSION_STATE = "state"
+SESSION_CONFIG = "config"
+SESSION_LOG = "log"
+SESSION_TIME = "time"
+SESSION_ORDER = (
+    SESSION_LOCK_ACTION,
+    SESSION_STATE,
+    SESSION_CONFIG,
+    SESSION_LOG,
+    SESSION_TIME,
+)
+
+
+@dataclass
+class NukiSessionStats:
+    """BLE connection statistics of the batched device sessions."""
+
+    sessions: int = 0
+    operations: int = 0
+    connections: int = 0
+    # Time this setup spent getting the key material and handing it to the device.
+    key_setup_time: float | None = None
+    # Time the key material took to derive when it was not cached yet.
+    key_derive_time: float | None = None
+    key_cache_hit: bool = False
+    # State refreshes ahead of predicted activity.
+    prefetches: int = 0
+    # Operations retried after a BLE error while another adapter or proxy heard the device.
+    failovers: int = 0
+    failover_successes: int = 0
+    # Lock actions not sent again because the state showed they took effect.
+    failover_resends_skipped: int = 0
+    # Time spent reconnecting and retrying.
+    failover_time: float = 0.0
+
+    @property
+    def connections_per_operation(self) -> float | None:
+        """Return the number of BLE connections needed per device operation."""
+        if not self.operations:
+            return None
+        return round(self.connections / self.operations, 3)
+
+
+@dataclass
+class NukiResourceStats:
+    """Host resources used by one coordinator since setup."""
+
+    # Time spent in callbacks of the coordinator and its entities on the event loop.
+    loop_time: float = 0.0
+    callbacks: int = 0
+    state_writes: int = 0
+    # Time spent waiting for device calls, including connecting.
+    ble_time: float = 0.0
+    ble_calls: int = 0
+    _depth: int = 0
+
+    @contextlib.contextmanager
+    def loop_callback(self):
+        """Account the time of an event loop callback.
+
+        Callbacks running inside an accounted callback are part of its time.
+        """
+        if self._depth:
+            yield
+            return
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.callbacks += 1
+            self.loop_time += time.perf_counter() - start
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for a service response or state attributes."""
+        return {
+            "loop_time_ms": round(self.loop_time * 1000, 3),
+            "callbacks": self.callbacks,
+            "state_writes": self.state_writes,
+            "ble_time_s": round(self.ble_time, 3),
+            "ble_calls": self.ble_calls,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class NukiSnapshot:
+    """Device data of one update, with the values entities derive from it.
+
+    Entities read from the snapshot instead of indexing the device state,
+    config and log entry and building timezones each on their own.
+    """
+
+    state: Any
+    config: Any
+    log_entry: dict
+    last_action_status: Any
+    battery_percentage: int | None
+    battery_critical: bool | None
+    battery_charging: bool | None
+    state_timestamp: datetime | None
+    log_timestamp: datetime | None
+    last_action_user: str
+    was_autounlock: bool
+
+    @classmethod
+    def from_device(cls, device: NukiDevice, log_entry: dict) -> NukiSnapshot:
+        """Build the snapshot of the current device data."""
+        state = device.keyturner_state
+        tz = None
+        if state is not None:
+            tz = timezone(timedelta(minutes=state["timezone_offset"]))
+        log_data = log_entry.get("data") or {}
+        log_timestamp = log_entry.get("timestamp")
+        return cls(
+            state=state,
+            config=device.config,
+            log_entry=log_entry,
+            last_action_status=device.last_action_status,
+            battery_percentage=None if state is None else device.battery_percentage,
+            battery_critical=None if state is None else device.is_battery_critical,
+            battery_charging=None if state is None else device.is_battery_charging,
+            state_timestamp=None if tz is None else state["current_time"].replace(tzinfo=tz),
+            log_timestamp=log_timestamp.replace(tzinfo=tz) if log_timestamp and tz else None,
+            # There is no user name if last action was triggered by button/manual etc.
+            last_action_user=log_entry.get("name") or log_data.get("trigger") or "Unknown",
+            was_autounlock=bool((log_data.get("flags") or 0) & 0x1),
+        )
 
 
 class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
@@ -38,6 +237,13 @@ class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
         device_name: str,
         connectable: bool,
         security_pin: int = None,
+        rssi_interval: int = DEFAULT_RSSI_INTERVAL,
+        rssi_per_advertisement: bool = False,
+        optimistic_lock_actions: bool = False,
+        poll_interval: int = DEFAULT_POLL_INTERVAL,
+        stale_after: int = DEFAULT_STALE_AFTER,
+        unavailable_after: int = DEFAULT_UNAVAILABLE_AFTER,
+        activity_prefetch: bool = True,
     ) -> None:
         """Initialize global nuki data updater."""
         super().__init__(
@@ -50,38 +256,431 @@ class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
             connectable=connectable,
         )
         self.ble_device = ble_device
+        # The adapter or proxy the device was last heard on.
+        self.source: str | None = None
         self.device = device
         self.device_name = device_name
         self.base_unique_id = base_unique_id
         self.model = None
         self.last_nuki_log_entry = {"index" : 0}
+        self._snapshot: NukiSnapshot | None = None
         self._security_pin = security_pin
         self._unsubscribe_nuki_callbacks = None
+        self._session_lock = asyncio.Lock()
+        # Queued (task, argument, waiters), see _queue_session_work.
+        self._pending_session: list[tuple[str, Any, list[asyncio.Future]]] = []
+        self.session_stats = NukiSessionStats()
+        self.resources = NukiResourceStats()
+        self.rssi_interval = rssi_interval
+        self.rssi_per_advertisement = rssi_per_advertisement
+        self.rssi_statistics = WindowStatistics()
+        self._rssi_window = WindowStatistics()
+        self._unsubscribe_rssi_timer = None
+        # Names stored data; entries set up with a manually entered address
+        # have no unique id.
+        self.storage_id = base_unique_id or ble_device.address.replace(":", "").lower()
+        self.statistics = NukiLongTermStatistics(
+            hass, self.storage_id, device_name or self.storage_id
+        )
+        self._statistics_state = None
+        self._unsubscribe_statistics_timer = None
+        self.recording: NukiTrafficRecording | None = None
+        self.optimistic_lock_actions = optimistic_lock_actions
+        self._unsubscribe_lock_action_timeout = None
+        self.lock_action_in_progress = False
+        self._unsubscribe_recording_states = None
+        self.poll_interval = poll_interval
+        # Entry data the connection was made with; a change needs a reload.
+        self.connection_data: tuple = ()
+        self.stale_after = stale_after
+        self.unavailable_after = unavailable_after
+        self.last_advertisement: float | None = None
+        self.last_state_read: float | None = None
+        self.stale = False
+        self.stale_unavailable = False
+        self._unsubscribe_watchdog = None
+        # Set when an advertisement signals a state change, see _async_detect_ring.
+        self._state_change_signaled = False
+        self._ring_state = None
+        # A ring waiting for its doorbell log entry, and the newest one seen.
+        self._ring_unconfirmed = False
+        self._doorbell_log_index: int | None = None
+        # Lock actions of this integration running, and when the last one ended.
+        self._own_actions = 0
+        self._own_action_ended: float | None = None
+        self.fire_events = True
+        # Whether failed operations may be retried over another adapter or proxy.
+        self.failover = True
+        self.activity = ActivityHistogram()
+        self.activity_prefetch = activity_prefetch
+        self._activity_window = False
+        self._unsubscribe_prefetch_timer = None
+
+    @callback
+    def async_apply_options(
+        self,
+        device_name: str,
+        security_pin: int | None,
+        rssi_interval: int,
+        rssi_per_advertisement: bool,
+        optimistic_lock_actions: bool,
+        poll_interval: int,
+        stale_after: int,
+        unavailable_after: int,
+        activity_prefetch: bool,
+    ) -> None:
+        """Apply changed options to the running coordinator.
+
+        Nothing here needs a new connection, so the device stays connected.
+        """
+        self.device_name = device_name
+        self._security_pin = security_pin
+        self.optimistic_lock_actions = optimistic_lock_actions
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.unavailable_after = unavailable_after
+        self.activity_prefetch = activity_prefetch
+        if (rssi_interval, rssi_per_advertisement) != (
+            self.rssi_interval,
+            self.rssi_per_advertisement,
+        ):
+            self.rssi_interval = rssi_interval
+            self.rssi_per_advertisement = rssi_per_advertisement
+            self._rssi_window = WindowStatistics()
+            self._async_stop_rssi_timer()
+            self._async_start_rssi_timer()
+        self.async_update_listeners()
+
+    @callback
+    def _async_start_rssi_timer(self) -> None:
+        if not self.rssi_per_advertisement and self._unsubscribe_nuki_callbacks:
+            self._unsubscribe_rssi_timer = async_track_time_interval(
+                self.hass,
+                self._async_publish_rssi_statistics,
+                timedelta(seconds=self.rssi_interval),
+            )
+
+    @callback
+    def _async_stop_rssi_timer(self) -> None:
+        if self._unsubscribe_rssi_timer is not None:
+            self._unsubscribe_rssi_timer()
+            self._unsubscribe_rssi_timer = None
+
+    @property
+    def snapshot(self) -> NukiSnapshot:
+        """Return the snapshot of the device data, rebuilt only when it changed."""
+        snapshot = self._snapshot
+        device = self.device
+        if (
+            snapshot is None
+            or snapshot.state is not device.keyturner_state
+            or snapshot.config is not device.config
+            or snapshot.log_entry is not self.last_nuki_log_entry
+            or snapshot.last_action_status is not device.last_action_status
+        ):
+            snapshot = self._snapshot = NukiSnapshot.from_device(
+                device, self.last_nuki_log_entry
+            )
+        return snapshot
 
     @callback
     def _async_start(self) -> None:
         self._unsubscribe_nuki_callbacks = self.device.subscribe(
             self._nuki_device_callback
         )
+        self._async_start_rssi_timer()
+        self._unsubscribe_watchdog = async_track_time_interval(
+            self.hass, self._async_watchdog, WATCHDOG_INTERVAL
+        )
+        self._activity_window = self.activity.likely(dt_util.utcnow())
+        self._unsubscribe_prefetch_timer = async_track_time_change(
+            self.hass, self._async_prefetch, minute=55, second=0
+        )
+        self._unsubscribe_statistics_timer = async_track_utc_time_change(
+            self.hass, self.statistics.async_flush, minute=0, second=30
+        )
         return super()._async_start()
 
     @callback
     def _async_stop(self) -> None:
         if self._unsubscribe_nuki_callbacks is not None:
             self._unsubscribe_nuki_callbacks()
+            self._unsubscribe_nuki_callbacks = None
+        self._async_stop_rssi_timer()
+        if self._unsubscribe_watchdog is not None:
+            self._unsubscribe_watchdog()
+            self._unsubscribe_watchdog = None
+        if self._unsubscribe_prefetch_timer is not None:
+            self._unsubscribe_prefetch_timer()
+            self._unsubscribe_prefetch_timer = None
+        if self._unsubscribe_statistics_timer is not None:
+            self._unsubscribe_statistics_timer()
+            self._unsubscribe_statistics_timer = None
+        self._async_cancel_lock_action_timeout()
         return super()._async_stop()
 
+    @callback
+    def _async_publish_rssi_statistics(self, now=None) -> None:
+        """Publish the RSSI statistics of the window that just ended.
+
+        A window without advertisements keeps the last statistics, HA does not
+        pass on advertisements that repeat the previous one.
+        """
+        if not self._rssi_window.samples:
+            return
+        self.rssi_statistics, self._rssi_window = self._rssi_window, WindowStatistics()
+        self.async_update_listeners()
+
+    @property
+    def staleness(self) -> float | None:
+        """Return the seconds since the last advertisement or state read.
+
+        HA does not pass on advertisements that repeat the previous one, so the
+        time of the last advertisement is also taken from the Bluetooth manager,
+        which records it for every advertisement.
+        """
+        last_seen = [self.last_advertisement, self.last_state_read]
+        if service_info := bluetooth.async_last_service_info(
+            self.hass, self.address, connectable=False
+        ):
+            last_seen.append(service_info.time)
+        last = max((t for t in last_seen if t is not None), default=None)
+        return None if last is None else time.monotonic() - last
+
+    @callback
+    def _async_watchdog(self, now=None) -> None:
+        """Mark the device stale or unavailable when it went quiet.
+
+        Going stale starts one reconnect and state read; the next one waits
+        until the device was heard from again.
+        """
+        staleness = self.staleness
+        if staleness is None:
+            return
+        stale = bool(self.stale_after) and staleness >= self.stale_after
+        unavailable = bool(self.unavailable_after) and staleness >= self.unavailable_after
+        if stale and not self.stale:
+            self.logger.info(
+                "%s: nothing heard for %d seconds, reconnecting", self.address, staleness
+            )
+            self.hass.async_create_background_task(
+                self._async_reconnect(), f"{self.address} reconnect"
+            )
+        changed = (stale, unavailable) != (self.stale, self.stale_unavailable)
+        self.stale, self.stale_unavailable = stale, unavailable
+        # Advertisements update the listeners while the device is fresh.
+        if changed or stale:
+            self.async_update_listeners()
+
+    async def _async_reconnect(self) -> None:
+        """Drop a possibly dead connection and read the state again."""
+        try:
+            async with self._session_lock:
+                if self._device_connected():
+                    await self._async_device_call("disconnect")
+            await self.async_run_session(SESSION_STATE)
+        except (BleakError, asyncio.TimeoutError, NukiErrorException) as ex:
+            self.logger.debug("%s: reconnect failed: %s", self.address, ex)
+        self.async_update_listeners()
+
+    def memory_usage(self) -> dict[str, int]:
+        """Return the bytes held by the device data, caches and buffers."""
+        return {
+            "device": deep_getsizeof(self.device.keyturner_state, self.device.config),
+            "log": deep_getsizeof(self.last_nuki_log_entry),
+            "statistics": deep_getsizeof(self.rssi_statistics, self._rssi_window)
+            + self.statistics.nbytes
+            + self.activity.nbytes,
+            "recording": 0 if self.recording is None else self.recording.nbytes,
+        }
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners."""
+        with self.resources.loop_callback():
+            super().async_update_listeners()
+
     @callback
     def _nuki_device_callback(self, command: NukiConst.NukiCommand = None) -> None:
+        with self.resources.loop_callback():
+            self._async_handle_device_callback(command)
+
+    @callback
+    def _async_handle_device_callback(self, command: NukiConst.NukiCommand) -> None:
+        if self.recording is not None:
+            self.recording.async_record_callback(command)
+        if (
+            self._unsubscribe_lock_action_timeout is not None
+            and command == NukiConst.NukiCommand.STATUS
+            and self.device.last_action_status == NukiConst.StatusCode.COMPLETED
+        ):
+            self._async_lock_action_completed()
+        self._async_record_statistics()
+        if command == NukiConst.NukiCommand.KEYTURNER_STATES:
+            self._async_detect_ring()
         self.async_update_listeners()
 
+    @callback
+    def _async_detect_ring(self) -> bool:
+        """Fire a ring event if a new opener state shows a doorbell ring.
+
+        A ring without ring to open only makes the opener signal a state change
+        in its advertisement, after which the state reads unchanged, including
+        the last lock action. With ring to open active, the opener starts
+        opening by itself. Rings without ring to open are confirmed afterwards
+        with the doorbell log entry if the log can be read.
+        """
+        if self.device.device_type != NukiConst.NukiDeviceType.OPENER:
+            return False
+        state = self.device.keyturner_state
+        signaled, self._state_change_signaled = self._state_change_signaled, False
+        if state is None or state is self._ring_state:
+            return False
+        previous, self._ring_state = self._ring_state, state
+        if previous is None:
+            return False
+        lock_state = state["lock_state"]
+        if (
+            signaled
+            and lock_state == NukiOpenerConst.LockState.LOCKED
+            and previous["lock_state"] == NukiOpenerConst.LockState.LOCKED
+            and state["nuki_state"] == previous["nuki_state"]
+            and state["config_update_count"] == previous["config_update_count"]
+            and all(
+                state[key] == previous[key]
+                for key in (
+                    "last_lock_action",
+                    "last_lock_action_trigger",
+                    "last_lock_action_completion_status",
+                )
+            )
+            and not self._own_action_recent
+        ):
+            ring_to_open = False
+        elif (
+            previous["lock_state"] == NukiOpenerConst.LockState.RTO_ACTIVE
+            and lock_state
+            in (NukiOpenerConst.LockState.OPENING, NukiOpenerConst.LockState.OPEN)
+            and not self._own_action_recent
+        ):
+            ring_to_open = True
+        else:
+            return False
+        if self.fire_events:
+            self.hass.bus.async_fire(
+                EVENT_RING,
+                {
+                    "address": self.address,
+                    "name": self.device_name,
+                    "ring_to_open": ring_to_open,
+                },
+            )
+            if not ring_to_open and self.logs_enabled:
+                self._ring_unconfirmed = True
+                self._async_refresh_in_background(SESSION_LOG)
+        return True
+
+    @callback
+    def _async_confirm_ring(self, newest_log: Container) -> None:
+        """Confirm or refute a pending ring with the newest log entry."""
+        # DOOR_SENSOR is DOORBELL_RECOGNITION on openers.
+        doorbell = newest_log.type == NukiConst.LogEntryType.DOOR_SENSOR
+        previous_index = self._doorbell_log_index
+        if doorbell:
+            self._doorbell_log_index = newest_log.index
+        if not self._ring_unconfirmed:
+            return
+        self._ring_unconfirmed = False
+        confirmed = doorbell and newest_log.index != previous_index
+        if not confirmed:
+            self.logger.debug("%s: ring not confirmed by the log", self.address)
+        self.hass.bus.async_fire(
+            EVENT_RING_CONFIRMED,
+            {"address": self.address, "name": self.device_name, "confirmed": confirmed},
+        )
+
+    @property
+    def _own_action_recent(self) -> bool:
+        """Return True while a lock action of ours may still move the device."""
+        return bool(self._own_actions) or (
+            self._own_action_ended is not None
+            and time.monotonic() - self._own_action_ended < LOCK_ACTION_COMPLETION_TIMEOUT
+        )
+
+    @callback
+    def _async_record_statistics(self) -> None:
+        """Feed a new keyturner state into the long-term statistics."""
+        state = self.device.keyturner_state
+        if state is None or state is self._statistics_state:
+            return
+        previous, self._statistics_state = self._statistics_state, state
+        self.statistics.async_add_battery(self.device.battery_percentage)
+        if previous is None:
+            return
+        if state["lock_state"] != previous["lock_state"]:
+            if state["lock_state"] == NukiLockConst.LockState.LOCKED:
+                self.statistics.async_add_event(STATISTIC_LOCK)
+                self.activity.async_add(dt_util.utcnow())
+            elif state["lock_state"] in self._unlocked_states():
+                self.statistics.async_add_event(STATISTIC_UNLOCK)
+                self.activity.async_add(dt_util.utcnow())
+        door_state = state.get("door_sensor_state")
+        if (
+            door_state != previous.get("door_sensor_state")
+            and door_state == NukiConst.DoorsensorState.DOOR_OPENED
+        ):
+            self.statistics.async_add_event(STATISTIC_DOOR)
+
+    def _unlocked_states(self) -> tuple:
+        if self.device.device_type == NukiConst.NukiDeviceType.OPENER:
+            return (
+                NukiOpenerConst.LockState.RTO_ACTIVE,
+                NukiOpenerConst.LockState.OPEN,
+            )
+        return (
+            NukiLockConst.LockState.UNLOCKED,
+            NukiLockConst.LockState.UNLATCHED,
+            NukiLockConst.LockState.UNLOCKED_LOCK_N_GO,
+        )
+
     @callback
     def _needs_poll(
         self,
         service_info: bluetooth.BluetoothServiceInfoBleak,
         seconds_since_last_poll: float | None,
     ) -> bool:
-        return self.device.poll_needed(seconds_since_last_poll)
+        if self._pending_session or self.device.poll_needed(seconds_since_last_poll):
+            return True
+        if not self.poll_interval or seconds_since_last_poll is None:
+            return False
+        interval = self.poll_interval
+        if (
+            self.activity_prefetch
+            and self.activity.learned
+            and not self._activity_window
+        ):
+            interval *= POLL_INTERVAL_BACKOFF
+        return seconds_since_last_poll >= interval
+
+    @callback
+    def _async_prefetch(self, now: datetime) -> None:
+        """Refresh the state shortly before an hour with predicted activity.
+
+        The refresh also opens the connection, so a lock action in that hour
+        does not have to wait for it. It is skipped if the state was read
+        recently anyway.
+        """
+        self._activity_window = self.activity.likely(now + timedelta(minutes=10))
+        if (
+            self.activity_prefetch
+            and self._activity_window
+            and (
+                self.last_state_read is None
+                or time.monotonic() - self.last_state_read >= PREFETCH_MIN_STATE_AGE
+            )
+        ):
+            self.session_stats.prefetches += 1
+            self._async_refresh_in_background(SESSION_STATE)
 
     async def _async_update(
         self, service_info: bluetooth.BluetoothServiceInfoBleak = None
@@ -89,8 +688,294 @@ class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
         """Poll the device."""
         if service_info:
             self.device.set_ble_device(service_info.device)
-        await self.device.update_state()
-        await self.async_get_last_action_log_entry()
+        await self.async_run_session(SESSION_STATE, SESSION_LOG)
+
+    def _device_connected(self) -> bool:
+        # pyNukiBT keeps the BleakClient private and connects lazily on send.
+        client = getattr(self.device, "_client", None)
+        return bool(client and client.is_connected)
+
+    async def async_run_session(self, *tasks: str, **args: Any) -> dict[str, Any]:
+        """Run device work back to back within one BLE session.
+
+        Work queued by other callers while a session is waiting is merged into
+        the same session. Task arguments are passed as keyword arguments named
+        after the task, e.g. ``time=...``. Returns the result of each task.
+        """
+        futures = self._queue_session_work(tasks, args, wait=True)
+        try:
+            async with self._session_lock:
+                if self._pending_session:
+                    pending, self._pending_session = self._pending_session, []
+                    await self._async_run_pending_session(pending)
+            return {task: await future for task, future in futures.items()}
+        except asyncio.CancelledError:
+            # Nobody will wait for the results of this caller any more.
+            for future in futures.values():
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    future.exception()
+            raise
+
+    @callback
+    def async_queue_session_work(self, *tasks: str, **args: Any) -> None:
+        """Queue device work to piggyback on the next session without waiting."""
+        self._queue_session_work(tasks, args, wait=False)
+
+    def _queue_session_work(
+        self, tasks: tuple[str, ...], args: dict[str, Any], wait: bool
+    ) -> dict[str, asyncio.Future]:
+        """Queue tasks, merging each into queued work with the same argument.
+
+        State, config and log reads take no argument and always merge. Lock
+        actions and time updates only merge with an equal one, otherwise they
+        are queued separately and run in the order they were queued.
+        """
+        futures = {}
+        for task in tasks:
+            arg = args.get(task)
+            waiters = next(
+                (
+                    queued_waiters
+                    for queued_task, queued_arg, queued_waiters in self._pending_session
+                    if queued_task == task and queued_arg == arg
+                ),
+                None,
+            )
+            if waiters is None:
+                waiters = []
+                self._pending_session.append((task, arg, waiters))
+            if wait:
+                futures[task] = self.hass.loop.create_future()
+                waiters.append(futures[task])
+        return futures
+
+    async def _async_run_pending_session(
+        self, pending: list[tuple[str, Any, list[asyncio.Future]]]
+    ) -> None:
+        self.session_stats.sessions += 1
+        error: BaseException | None = None
+        # sorted() is stable, so work of the same kind keeps its queue order.
+        work = sorted(pending, key=lambda queued: SESSION_ORDER.index(queued[0]))
+        for index, (task, arg, waiters) in enumerate(work):
+            if waiters and all(waiter.done() for waiter in waiters):
+                # Every caller of this work was cancelled.
+                continue
+            if error is None:
+                if not self._device_connected():
+                    self.session_stats.connections += 1
+                self.session_stats.operations += 1
+                try:
+                    result = await self._async_run_session_task_with_failover(task, arg)
+                except asyncio.CancelledError:
+                    # The caller running the session was cancelled. Work that
+                    # did not start is queued again for the other callers, the
+                    # interrupted task fails for them.
+                    self._pending_session[:0] = work[index + 1 :]
+                    error = HomeAssistantError(f"{self.address}: {task} was interrupted")
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(error)
+                    raise
+                except Exception as ex:  # handed to every waiter of the session
+                    error = ex
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if error is None:
+                    waiter.set_result(result)
+                else:
+                    waiter.set_exception(error)
+
+    async def _async_run_session_task_with_failover(self, task: str, arg: Any) -> Any:
+        """Run a session task, retrying it once on a new connection.
+
+        Only done while another adapter or proxy hears the device. Home
+        Assistant picks the path of the new connection itself, preferring
+        paths without recent connection failures, so the retry is not
+        guaranteed to avoid the path that failed.
+
+        Reading state, config and log and setting the time are safe to repeat.
+        A lock action is only sent again when a fresh state read shows it did
+        not take effect; momentary actions are never sent again. When a retry
+        is possible, the first attempt is cut short so it fits the deadline.
+        """
+        start = time.monotonic()
+        action_state = None
+        if task == SESSION_LOCK_ACTION:
+            if arg[0] in MOMENTARY_LOCK_ACTIONS:
+                return await self._async_run_session_task(task, arg)
+            if self.device.keyturner_state:
+                action_state = self._lock_action_state()
+        if not self.failover or not self._failover_candidates():
+            return await self._async_run_session_task(task, arg)
+        try:
+            async with async_timeout.timeout(FAILOVER_FIRST_ATTEMPT):
+                return await self._async_run_session_task(task, arg)
+        except (BleakError, asyncio.TimeoutError) as ex:
+            remaining = FAILOVER_DEADLINE - (time.monotonic() - start)
+            if remaining <= 0 or not self._failover_candidates():
+                raise
+            self.logger.debug("%s: %s failed (%s), retrying", self.address, task, ex)
+        self.session_stats.failovers += 1
+        failover_start = time.monotonic()
+        try:
+            async with async_timeout.timeout(remaining):
+                await self._async_device_call("disconnect")
+                if task == SESSION_LOCK_ACTION:
+                    result = await self._async_retry_lock_action(arg, action_state)
+                else:
+                    result = await self._async_run_session_task(task, arg)
+        finally:
+            self.session_stats.failover_time += time.monotonic() - failover_start
+        self.session_stats.failover_successes += 1
+        return result
+
+    def _failover_candidates(self) -> list:
+        """Return the other connectable adapters and proxies that hear the device.
+
+        Until an advertisement showed which path the device is heard on, the
+        only path would count as another one, so there are none.
+        """
+        if self.source is None:
+            return []
+        return [
+            scanner_device
+            for scanner_device in bluetooth.async_scanner_devices_by_address(
+                self.hass, self.address, connectable=True
+            )
+            if scanner_device.scanner.source != self.source
+        ]
+
+    def _lock_action_state(self) -> tuple:
+        """Return the keyturner state fields a carried out lock action changes."""
+        state = self.device.keyturner_state
+        return tuple(state[key] for key in LOCK_ACTION_STATE_FIELDS)
+
+    async def _async_retry_lock_action(self, arg: Any, action_state: tuple | None) -> Any:
+        """Send a lock action again unless the state shows it took effect."""
+        await self._async_run_session_task(SESSION_STATE, None)
+        if action_state is not None and self._lock_action_state() != action_state:
+            self.session_stats.failover_resends_skipped += 1
+            return Container(status=NukiConst.StatusCode.ACCEPTED)
+        return await self._async_run_session_task(SESSION_LOCK_ACTION, arg)
+
+    async def _async_run_session_task(self, task: str, arg: Any) -> Any:
+        if task == SESSION_LOCK_ACTION:
+            action, name_suffix, wait_for_completed = arg
+            return await self._async_device_call(
+                "lock_action",
+                action,
+                name_suffix=name_suffix,
+                wait_for_completed=wait_for_completed,
+            )
+        if task == SESSION_STATE:
+            result = await self._async_device_call("update_state")
+            self.last_state_read = time.monotonic()
+            self.stale = self.stale_unavailable = False
+            self._async_record_statistics()
+            if self._async_detect_ring():
+                # Don't hold the ring back until the rest of the session is done.
+                self.async_update_listeners()
+            return result
+        if task == SESSION_CONFIG:
+            return await self._async_device_call("update_config")
+        if task == SESSION_LOG:
+            return await self.async_get_last_action_log_entry()
+        if task == SESSION_TIME:
+            return await self._async_device_call(
+                "update_nuki_time", self._security_pin, arg
+            )
+        raise ValueError(f"Unknown session task {task}")
+
+    async def _async_device_call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a NukiDevice coroutine, recording it if a recording is active."""
+        start = time.monotonic()
+        try:
+            result = await getattr(self.device, method)(*args, **kwargs)
+        except Exception as ex:
+            if self.recording is not None:
+                self.recording.async_record_call(method, args, kwargs, start, error=ex)
+            raise
+        finally:
+            self.resources.ble_calls += 1
+            self.resources.ble_time += time.monotonic() - start
+        if self.recording is not None:
+            self.recording.async_record_call(method, args, kwargs, start, result=result)
+        return result
+
+    async def async_lock_action(self, action, name_suffix: str = None) -> Any:
+        """Run a lock action.
+
+        By default this waits for the motor to complete and reads the log in
+        the same session. With optimistic lock actions it returns as soon as
+        the device accepted the command; completion and the log update arrive
+        later through the device callbacks.
+        """
+        self._own_actions += 1
+        try:
+            return await self._async_lock_action(action, name_suffix)
+        finally:
+            self._own_actions -= 1
+            self._own_action_ended = time.monotonic()
+
+    async def _async_lock_action(self, action, name_suffix: str) -> Any:
+        if not self.optimistic_lock_actions:
+            results = await self.async_run_session(
+                SESSION_LOCK_ACTION, SESSION_LOG, lock_action=(action, name_suffix, True)
+            )
+            return results[SESSION_LOCK_ACTION]
+        self.lock_action_in_progress = True
+        try:
+            results = await self.async_run_session(
+                SESSION_LOCK_ACTION, lock_action=(action, name_suffix, False)
+            )
+        except Exception:
+            self.lock_action_in_progress = False
+            raise
+        result = results[SESSION_LOCK_ACTION]
+        if result.status == NukiConst.StatusCode.COMPLETED:
+            self._async_lock_action_completed()
+        else:
+            self._async_cancel_lock_action_timeout()
+            self._unsubscribe_lock_action_timeout = async_call_later(
+                self.hass, LOCK_ACTION_COMPLETION_TIMEOUT, self._async_lock_action_timeout
+            )
+        return result
+
+    @callback
+    def _async_cancel_lock_action_timeout(self) -> None:
+        if self._unsubscribe_lock_action_timeout is not None:
+            self._unsubscribe_lock_action_timeout()
+            self._unsubscribe_lock_action_timeout = None
+
+    @callback
+    def _async_lock_action_completed(self) -> None:
+        """Fetch the state and log entry of a completed lock action in the background."""
+        self.lock_action_in_progress = False
+        self._async_cancel_lock_action_timeout()
+        self._async_refresh_in_background(SESSION_STATE, SESSION_LOG)
+
+    @callback
+    def _async_lock_action_timeout(self, now=None) -> None:
+        """Refresh the state if no completion was received for a lock action."""
+        self._unsubscribe_lock_action_timeout = None
+        self.lock_action_in_progress = False
+        self._async_refresh_in_background(SESSION_STATE, SESSION_LOG)
+
+    @callback
+    def _async_refresh_in_background(self, *tasks: str) -> None:
+        async def _async_refresh() -> None:
+            try:
+                await self.async_run_session(*tasks)
+            except (BleakError, asyncio.TimeoutError, NukiErrorException) as ex:
+                self.logger.debug("%s: background refresh failed: %s", self.address, ex)
+            self.async_update_listeners()
+
+        self.hass.async_create_background_task(
+            _async_refresh(), f"{self.address} background refresh"
+        )
 
     @callback
     def _async_handle_bluetooth_event(
@@ -99,11 +984,77 @@ class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
         change: bluetooth.BluetoothChange,
     ) -> None:
         """Handle a Bluetooth event."""
+        start = time.perf_counter()
+        with self.resources.loop_callback():
+            self._async_handle_advertisement(service_info)
+            super()._async_handle_bluetooth_event(service_info, change)
+        if self.recording is not None:
+            self.recording.async_record_advertisement(
+                service_info, time.perf_counter() - start
+            )
+
+    @callback
+    def _async_handle_advertisement(
+        self, service_info: bluetooth.BluetoothServiceInfoBleak
+    ) -> None:
+        """Feed an advertisement of the device into the coordinator state."""
         self.ble_device = service_info.device
+        self.source = service_info.source
+        self.last_advertisement = time.monotonic()
+        self.stale = self.stale_unavailable = False
+        poll_needed = self.device.poll_needed()
         self.device.parse_advertisement_data(
             service_info.device, service_info.advertisement
         )
-        super()._async_handle_bluetooth_event(service_info, change)
+        if not poll_needed and self.device.poll_needed():
+            self._state_change_signaled = True
+        if not self.rssi_per_advertisement:
+            self._rssi_window.add(service_info.rssi)
+
+    async def async_get_config(self, refresh: bool = False) -> tuple[dict, bool]:
+        """Return the device config and whether it came from the cache.
+
+        State reads already fetch the config again when the device reports a
+        changed config_update_count, so the cached copy is current.
+        """
+        if refresh or not self.device.config:
+            await self.async_run_session(SESSION_CONFIG)
+            return self.device.config, False
+        return self.device.config, True
+
+    @property
+    def logs_enabled(self) -> bool:
+        """Return True if the log can be read, which needs the security PIN."""
+        return self._security_pin is not None
+
+    @callback
+    def async_start_recording(self, entry_id: str, path: str) -> None:
+        """Start recording the device traffic to path."""
+        if self.recording is not None:
+            raise HomeAssistantError(f"Already recording to {self.recording.path}")
+        self.recording = recording = NukiTrafficRecording(self.hass, self, entry_id, path)
+        self._unsubscribe_recording_states = self.async_add_listener(
+            recording.async_record_entity_states
+        )
+
+        @callback
+        def _async_recording_full() -> None:
+            if self.recording is recording:
+                self.hass.async_create_background_task(
+                    self.async_stop_recording(), f"{self.address} stop full recording"
+                )
+
+        recording.on_full = _async_recording_full
+
+    async def async_stop_recording(self) -> str:
+        """Stop recording and write the recording file. Returns its path."""
+        if self.recording is None:
+            raise HomeAssistantError("Not recording")
+        recording, self.recording = self.recording, None
+        self._unsubscribe_recording_states()
+        self._unsubscribe_recording_states = None
+        await self.hass.async_add_executor_job(recording.write)
+        return recording.path
 
     async def async_wait_ready(self) -> bool:
         """Wait for the device to be ready."""
@@ -118,19 +1069,32 @@ class NukiDataUpdateCoordinator(ActiveBluetoothDataUpdateCoordinator[None]):
 
     async def async_get_last_action_log_entry(self):
         """Get the last action log entry."""
+        previous_index = self.last_nuki_log_entry["index"]
+        await self._async_get_last_action_log_entry()
+        if (
+            previous_index
+            and self.last_nuki_log_entry["index"] > previous_index
+            and self.last_nuki_log_entry["type"] == NukiConst.LogEntryType.KEYPAD_ACTION
+        ):
+            self.statistics.async_add_event(STATISTIC_KEYPAD)
+
+    async def _async_get_last_action_log_entry(self):
         if self._security_pin is not None: #security pin can be 0, so check for None
             # get the latest log entry
             # todo: check if Nuki logging is enabled
-            logs = await self.device.request_log_entries(
-                security_pin=self._security_pin, count=1
+            logs = await self._async_device_call(
+                "request_log_entries", security_pin=self._security_pin, count=1
             )
             if logs:
+                if self.device.device_type == NukiConst.NukiDeviceType.OPENER:
+                    self._async_confirm_ring(logs[0])
                 if logs[0].type in [NukiConst.LogEntryType.LOCK_ACTION, NukiConst.LogEntryType.KEYPAD_ACTION]:
                     # todo: handle other log types
                     self.last_nuki_log_entry = logs[0]
                 elif logs[0].index > self.last_nuki_log_entry["index"]:
                     # if there are new log entries, get max 10 entries
-                    logs = await self.device.request_log_entries(
+                    logs = await self._async_device_call(
+                        "request_log_entries",
                         security_pin=self._security_pin,
                         count=min(10, logs[0].index - self.last_nuki_log_entry["index"]),
                         start_index=logs[0].index,
@@ -0,0 +1,94 @@
+"""Cached key material for hass_nuki_bt."""
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+
+import nacl.secret
+from nacl.bindings.crypto_box import crypto_box_beforenm
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from pyNukiBT import NukiDevice
+
+from .const import (
+    CONF_AUTH_ID,
+    CONF_DEVICE_PUBLIC_KEY,
+    CONF_PRIVATE_KEY,
+    CONF_PUBLIC_KEY,
+    DOMAIN,
+)
+
+DATA_KEY_CACHE = f"{DOMAIN}_key_cache"
+
+
+@dataclass(frozen=True, slots=True)
+class NukiKeyMaterial:
+    """Decoded credentials and the derived NaCl shared key of one entry."""
+
+    fingerprint: str
+    auth_id: bytes
+    nuki_public_key: bytes
+    bridge_public_key: bytes
+    bridge_private_key: bytes
+    shared_key: bytes
+    box: nacl.secret.SecretBox
+    setup_time: float
+
+
+def _fingerprint(entry: ConfigEntry) -> str:
+    credentials = "|".join(
+        entry.data[key]
+        for key in (CONF_AUTH_ID, CONF_DEVICE_PUBLIC_KEY, CONF_PUBLIC_KEY, CONF_PRIVATE_KEY)
+    )
+    return hashlib.sha256(credentials.encode()).hexdigest()
+
+
+@callback
+def async_get_key_material(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> tuple[NukiKeyMaterial, bool]:
+    """Return the key material of an entry and whether it came from the cache.
+
+    The material is kept for the lifetime of Home Assistant and only derived
+    again when the credentials of the entry change.
+    """
+    cache: dict[str, NukiKeyMaterial] = hass.data.setdefault(DATA_KEY_CACHE, {})
+    fingerprint = _fingerprint(entry)
+    if (keys := cache.get(entry.entry_id)) and keys.fingerprint == fingerprint:
+        return keys, True
+    start = time.perf_counter()
+    nuki_public_key = bytes.fromhex(entry.data[CONF_DEVICE_PUBLIC_KEY])
+    bridge_private_key = bytes.fromhex(entry.data[CONF_PRIVATE_KEY])
+    shared_key = crypto_box_beforenm(nuki_public_key, bridge_private_key)
+    box = nacl.secret.SecretBox(shared_key)
+    cache[entry.entry_id] = keys = NukiKeyMaterial(
+        fingerprint=fingerprint,
+        auth_id=bytes.fromhex(entry.data[CONF_AUTH_ID]),
+        nuki_public_key=nuki_public_key,
+        bridge_public_key=bytes.fromhex(entry.data[CONF_PUBLIC_KEY]),
+        bridge_private_key=bridge_private_key,
+        shared_key=shared_key,
+        box=box,
+        setup_time=time.perf_counter() - start,
+    )
+    return keys, False
+
+
+@callback
+def async_forget_key_material(hass: HomeAssistant, entry_id: str) -> None:
+    """Drop the cached key material of an entry."""
+    hass.data.get(DATA_KEY_CACHE, {}).pop(entry_id, None)
+
+
+def apply_key_material(device: NukiDevice, keys: NukiKeyMaterial) -> None:
+    """Hand cached key material to a NukiDevice created without the Nuki public key.
+
+    NukiDevice derives the shared key in its constructor when it gets both
+    keys, so it is created without the Nuki public key and given the cached
+    material instead.
+    """
+    device._nuki_public_key = keys.nuki_public_key
+    device._shared_key = keys.shared_key
+    device._box = keys.box
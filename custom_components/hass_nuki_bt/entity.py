@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import logging
+import time
+from datetime import date, time as dt_time
 
 from homeassistant.components.bluetooth.passive_update_coordinator import (
     PassiveBluetoothCoordinatorEntity,
@@ -10,10 +12,15 @@ from homeassistant.core import callback
 from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.util import dt as dt_util
 from pyNukiBT import NukiDevice
 
-from .const import MANUFACTURER
-from .coordinator import NukiDataUpdateCoordinator
+from .const import DOMAIN, MANUFACTURER
+from .coordinator import (
+    LOCK_ACTION_COMPLETION_TIMEOUT,
+    SESSION_TIME,
+    NukiDataUpdateCoordinator,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,6 +30,11 @@ class NukiEntity(PassiveBluetoothCoordinatorEntity[NukiDataUpdateCoordinator]):
 
     device: NukiDevice
     _attr_has_entity_name = True
+    _optimistic_state = None
+    _optimistic_from = None
+    _optimistic_from_state = None
+    _optimistic_pending = False
+    _optimistic_until = 0.0
 
     def __init__(self, coordinator: NukiDataUpdateCoordinator) -> None:
         """Initialize the entity."""
@@ -43,10 +55,21 @@ class NukiEntity(PassiveBluetoothCoordinatorEntity[NukiDataUpdateCoordinator]):
             ),
         )
 
+    @property
+    def available(self) -> bool:
+        """Return False while the device has been silent for too long."""
+        return super().available and not self.coordinator.stale_unavailable
+
     @callback
     def _async_update_attrs(self) -> None:
         """Update the entity attributes."""
 
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state to the state machine, counting the write."""
+        self.coordinator.resources.state_writes += 1
+        super().async_write_ha_state()
+
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle data update."""
@@ -54,23 +77,117 @@ class NukiEntity(PassiveBluetoothCoordinatorEntity[NukiDataUpdateCoordinator]):
         self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
-        """Register callbacks."""
-        self.async_on_remove(
-            self.coordinator.async_add_listener(self._handle_coordinator_update)
-        )
+        """Compute the initial state.
+
+        This is deferred from __init__ so entities that are disabled, and never
+        added, cost nothing. The coordinator listener is registered by the base
+        class.
+        """
+        self._async_update_attrs()
         return await super().async_added_to_hass()
 
-    async def async_lock_action(self, action):
-        """Do door action."""
+    async def async_lock_action(self, action, optimistic_state=None):
+        """Do door action.
+
+        With optimistic lock actions, optimistic_state is shown until the device
+        reports a different lock state or the action times out.
+        """
         user = await self.hass.auth.async_get_user(self._context.user_id)
         user_name = user.name if user else None
-        await self.device.lock_action(action, name_suffix=user_name, wait_for_completed = True)
-        await self.coordinator.async_get_last_action_log_entry()
+        if self.coordinator.optimistic_lock_actions and optimistic_state is not None:
+            self._optimistic_from_state = self.device.keyturner_state
+            self._optimistic_from = self._optimistic_from_state["lock_state"]
+            self._optimistic_state = optimistic_state
+            self._optimistic_pending = True
+            self._optimistic_until = time.monotonic() + LOCK_ACTION_COMPLETION_TIMEOUT
+            self._async_update_attrs()
+            self.async_write_ha_state()
+        try:
+            await self.coordinator.async_lock_action(action, name_suffix=user_name)
+        except Exception:
+            self._optimistic_state = None
+            self._async_update_attrs()
+            self.async_write_ha_state()
+            raise
+        finally:
+            self._optimistic_pending = False
         self.coordinator.async_update_listeners()
 
-    async def async_handle_update_nuki_time(self, time=None):
-        """Update nuki time."""
+    def _lock_state(self):
+        """Return the lock state, or the optimistic one while an action runs.
+
+        The optimistic state is kept until the device reports a different lock
+        state, or the same one in a state read after the action completed.
+        """
+        keyturner_state = self.device.keyturner_state
+        state = keyturner_state["lock_state"]
+        if self._optimistic_state is not None:
+            if (
+                state == self._optimistic_from
+                and time.monotonic() < self._optimistic_until
+                and (
+                    self._optimistic_pending
+                    or self.coordinator.lock_action_in_progress
+                    or keyturner_state is self._optimistic_from_state
+                )
+            ):
+                return self._optimistic_state
+            self._optimistic_state = None
+            self._optimistic_from_state = None
+        return state
+
+    async def async_handle_update_nuki_time(self, time=None, wait=True):
+        """Update nuki time.
+
+        Without wait, the update is queued to run in the next device session
+        instead of connecting for it.
+        """
         if self.coordinator._security_pin is None: #security pin can be 0, so check for None
             raise ServiceValidationError("Security PIN is required to update nuki time.")
-        result = await self.device.update_nuki_time(self.coordinator._security_pin, time)
-        return result.status
+        if not wait:
+            if time is not None:
+                # The next session may be hours away, the time would be stale.
+                raise ServiceValidationError("A time can only be set with wait enabled.")
+            self.coordinator.async_queue_session_work(SESSION_TIME)
+            return None
+        results = await self.coordinator.async_run_session(SESSION_TIME, time=time)
+        return results[SESSION_TIME].status
+
+    async def async_handle_get_config(self, refresh=False):
+        """Return the device configuration."""
+        config, cached = await self.coordinator.async_get_config(refresh)
+        return {"config": _service_response_value(config), "cached": cached}
+
+    async def async_handle_start_recording(self, path=None):
+        """Start recording the device traffic."""
+        if path is None:
+            path = self.hass.config.path(
+                f"{DOMAIN}_{self.coordinator.storage_id}_{dt_util.utcnow():%Y%m%d%H%M%S}.jsonl.gz"
+            )
+        elif not self.hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Writing to {path} is not allowed.")
+        self.coordinator.async_start_recording(self.registry_entry.config_entry_id, path)
+        return {"path": path}
+
+    async def async_handle_stop_recording(self):
+        """Stop recording the device traffic and write the recording."""
+        return {"path": await self.coordinator.async_stop_recording()}
+
+
+def _service_response_value(value):
+    """Convert a pyNukiBT value to something a service can respond with."""
+    if isinstance(value, dict):
+        return {
+            str(k): _service_response_value(v)
+            for k, v in value.items()
+            if not str(k).startswith("_")
+        }
+    if isinstance(value, list | tuple):
+        return [_service_response_value(v) for v in value]
+    if isinstance(value, bytes | bytearray):
+        return value.hex()
+    if isinstance(value, date | dt_time):
+        return value.isoformat()
+    if value is None or isinstance(value, bool | int | float):
+        return value
+    return str(value)
@@ -0,0 +1,52 @@
+"""Event platform for hass_nuki_bt."""
+from __future__ import annotations
+
+from homeassistant.components.event import (
+    EventDeviceClass,
+    EventEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, EVENT_RING
+from .coordinator import NukiDataUpdateCoordinator
+from .entity import NukiEntity
+
+EVENT_TYPE_RING = "ring"
+EVENT_TYPE_RING_TO_OPEN = "ring_to_open"
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the Nuki Opener doorbell based on a config entry."""
+    coordinator: NukiDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities([NukiRingEvent(coordinator)])
+
+
+class NukiRingEvent(NukiEntity, EventEntity):
+    """Doorbell rings seen by a Nuki Opener."""
+
+    _attr_name = "Doorbell"
+    _attr_device_class = EventDeviceClass.DOORBELL
+    _attr_event_types = [EVENT_TYPE_RING, EVENT_TYPE_RING_TO_OPEN]
+
+    def __init__(self, coordinator: NukiDataUpdateCoordinator) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.base_unique_id}-ring"
+
+    async def async_added_to_hass(self) -> None:
+        """Listen for ring events of this opener."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.hass.bus.async_listen(EVENT_RING, self._async_ring))
+
+    @callback
+    def _async_ring(self, event: Event) -> None:
+        if event.data["address"] != self.coordinator.address:
+            return
+        self._trigger_event(
+            EVENT_TYPE_RING_TO_OPEN if event.data["ring_to_open"] else EVENT_TYPE_RING
+        )
+        self.async_write_ha_state()
@@ -20,6 +20,16 @@ UPDATE_NUKI_TIME_SERVICE_NAME = "update_nuki_time"
 # Has to be a simple dictionary to be extended with "target" parameters.
 UPDATE_NUKI_TIME_SCHEMA = {
     vol.Optional("time"): cv.datetime,
+    vol.Optional("wait", default=True): cv.boolean,
+}
+START_RECORDING_SERVICE_NAME = "start_recording"
+START_RECORDING_SCHEMA = {
+    vol.Optional("path"): cv.string,
+}
+STOP_RECORDING_SERVICE_NAME = "stop_recording"
+GET_CONFIG_SERVICE_NAME = "get_config"
+GET_CONFIG_SCHEMA = {
+    vol.Optional("refresh", default=False): cv.boolean,
 }
 
 async def async_setup_entry(
@@ -38,6 +48,24 @@ async def async_setup_entry(
         func="async_handle_update_nuki_time",
         supports_response=SupportsResponse.OPTIONAL,
     )
+    platform.async_register_entity_service(
+        START_RECORDING_SERVICE_NAME,
+        schema=START_RECORDING_SCHEMA,
+        func="async_handle_start_recording",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        STOP_RECORDING_SERVICE_NAME,
+        schema={},
+        func="async_handle_stop_recording",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    platform.async_register_entity_service(
+        GET_CONFIG_SERVICE_NAME,
+        schema=GET_CONFIG_SCHEMA,
+        func="async_handle_get_config",
+        supports_response=SupportsResponse.ONLY,
+    )
 
 
 class NukiLock(NukiEntity, LockEntity):
@@ -55,29 +83,37 @@ class NukiLock(NukiEntity, LockEntity):
         super().__init__(coordinator)
         self._attr_unique_id = f"{coordinator.base_unique_id}-lock"
         self._attr_supported_features = LockEntityFeature.OPEN
-        self._async_update_attrs()
 
     def _async_update_attrs(self) -> None:
         """Update the entity attributes."""
-        status = self.device.keyturner_state.lock_state
-        self._attr_is_jammed = status is NukiLockConst.LockState.MOTOR_BLOCKED
-        self._attr_is_open = status is NukiOpenerConst.LockState.OPEN
-        self._attr_is_opening = status is  NukiOpenerConst.LockState.OPENING
-        self._attr_is_locked = status is NukiLockConst.LockState.LOCKED
-        self._attr_is_locking = status is NukiLockConst.LockState.LOCKING
-        self._attr_is_unlocking = status is NukiLockConst.LockState.UNLOCKING
+        status = self._lock_state()
+        self._attr_is_jammed = status == NukiLockConst.LockState.MOTOR_BLOCKED
+        self._attr_is_open = status == NukiOpenerConst.LockState.OPEN
+        self._attr_is_opening = status in (
+            NukiOpenerConst.LockState.OPENING,
+            NukiLockConst.LockState.UNLATCHING,
+        )
+        self._attr_is_locked = status == NukiLockConst.LockState.LOCKED
+        self._attr_is_locking = status == NukiLockConst.LockState.LOCKING
+        self._attr_is_unlocking = status == NukiLockConst.LockState.UNLOCKING
 
     async def async_lock(self, **kwargs: Any) -> None:
         """Lock the lock."""
-        await self.async_lock_action(NukiLockConst.LockAction.LOCK)
+        await self.async_lock_action(
+            NukiLockConst.LockAction.LOCK, NukiLockConst.LockState.LOCKING
+        )
 
     async def async_unlock(self, **kwargs: Any) -> None:
         """Unlock the lock."""
-        await self.async_lock_action(NukiLockConst.LockAction.UNLOCK)
+        await self.async_lock_action(
+            NukiLockConst.LockAction.UNLOCK, NukiLockConst.LockState.UNLOCKING
+        )
 
     async def async_open(self, **kwargs: Any) -> None:
         """Open the door latch."""
-        await self.async_lock_action(NukiLockConst.LockAction.UNLATCH)
+        await self.async_lock_action(
+            NukiLockConst.LockAction.UNLATCH, NukiLockConst.LockState.UNLATCHING
+        )
 
 class NukiOpener(NukiEntity, LockEntity):
     """Representation of a Nuki opener."""
@@ -92,25 +128,31 @@ class NukiOpener(NukiEntity, LockEntity):
         super().__init__(coordinator)
         self._attr_unique_id = f"{coordinator.base_unique_id}-lock"
         self._attr_supported_features = LockEntityFeature.OPEN
-        self._async_update_attrs()
 
     def _async_update_attrs(self) -> None:
         """Update the entity attributes."""
-        status = self.device.keyturner_state.lock_state
-        self._attr_is_jammed = status is NukiOpenerConst.LockState.UNCALIBRATED
-        self._attr_is_open = status is NukiOpenerConst.LockState.OPEN
-        self._attr_is_opening = status is NukiOpenerConst.LockState.OPENING
-        self._attr_is_locked = status is NukiOpenerConst.LockState.LOCKED
-        self._attr_is_unknown = status is NukiOpenerConst.LockState.UNDEFINED
+        status = self._lock_state()
+        self._attr_is_jammed = status == NukiOpenerConst.LockState.UNCALIBRATED
+        self._attr_is_open = status == NukiOpenerConst.LockState.OPEN
+        self._attr_is_opening = status == NukiOpenerConst.LockState.OPENING
+        self._attr_is_locked = status == NukiOpenerConst.LockState.LOCKED
+        self._attr_is_unknown = status == NukiOpenerConst.LockState.UNDEFINED
 
     async def async_lock(self, **kwargs: Any) -> None:
         """Lock the lock."""
-        await self.async_lock_action(NukiOpenerConst.LockAction.DEACTIVATE_RTO)
+        await self.async_lock_action(
+            NukiOpenerConst.LockAction.DEACTIVATE_RTO, NukiOpenerConst.LockState.LOCKED
+        )
 
     async def async_unlock(self, **kwargs: Any) -> None:
         """Unlock the lock."""
-        await self.async_lock_action(NukiOpenerConst.LockAction.ACTIVATE_RTO)
+        await self.async_lock_action(
+            NukiOpenerConst.LockAction.ACTIVATE_RTO, NukiOpenerConst.LockState.RTO_ACTIVE
+        )
 
     async def async_open(self, **kwargs: Any) -> None:
         """Open the door latch."""
-        await self.async_lock_action(NukiOpenerConst.LockAction.ELECTRIC_STRIKE_ACTUATION)
+        await self.async_lock_action(
+            NukiOpenerConst.LockAction.ELECTRIC_STRIKE_ACTUATION,
+            NukiOpenerConst.LockState.OPENING,
+        )
@@ -0,0 +1,493 @@
+"""Record and replay the device traffic of hass_nuki_bt."""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any
+
+from construct import Container, ListContainer
+from construct.core import EnumIntegerString
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pyNukiBT import NukiConst
+
+from .statistics import deep_getsizeof
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+# Stop recording automatically to bound the memory held by a forgotten recording.
+MAX_RECORDS = 100_000
+
+RECORD_ADVERTISEMENT = "adv"
+RECORD_CALL = "call"
+RECORD_CALLBACK = "cb"
+RECORD_STATES = "states"
+
+
+def to_json(value: Any) -> Any:
+    """Convert pyNukiBT values to JSON, keeping enough type info to restore them."""
+    if isinstance(value, EnumIntegerString):
+        return {"__enum__": [int(value), str(value)]}
+    if isinstance(value, dict):
+        return {
+            str(k): to_json(v) for k, v in value.items() if not str(k).startswith("_")
+        }
+    if isinstance(value, list | tuple):
+        return [to_json(v) for v in value]
+    if isinstance(value, bytes | bytearray):
+        return {"__bytes__": value.hex()}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if value is None or isinstance(value, bool | int | float | str):
+        return value
+    return str(value)
+
+
+def from_json(value: Any) -> Any:
+    """Restore a value written by to_json."""
+    if isinstance(value, dict):
+        if "__enum__" in value:
+            return EnumIntegerString.new(*value["__enum__"])
+        if "__bytes__" in value:
+            return bytes.fromhex(value["__bytes__"])
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        return Container({k: from_json(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return ListContainer(from_json(v) for v in value)
+    return value
+
+
+class NukiTrafficRecording:
+    """In-memory recording of the traffic of one coordinator.
+
+    Every record is ``[seconds since start, kind, data]``. Device state is only
+    included when it changed since the previous record, to keep the file small.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str, path: str) -> None:
+        """Initialize the recording."""
+        self.hass = hass
+        self.path = path
+        self._device = coordinator.device
+        self._start = time.monotonic()
+        self._entity_ids = {
+            entity.entity_id: entity.unique_id
+            for entity in er.async_entries_for_config_entry(er.async_get(hass), entry_id)
+        }
+        self._last_state = None
+        self._last_config = None
+        self._last_states: dict[str, str] = {}
+        self.records: list = []
+        # Memory held by the records, counted as they are added.
+        self.nbytes = 0
+        # Called once when the recording reaches MAX_RECORDS.
+        self.on_full: Callable[[], None] | None = None
+        self.header = {
+            "version": RECORDING_VERSION,
+            "created": dt_util.utcnow().isoformat(),
+            "address": coordinator.address,
+            "unique_id": coordinator.base_unique_id,
+            "device_type": to_json(self._device.device_type),
+            "logs_enabled": coordinator.logs_enabled,
+            "snapshot": self._snapshot(),
+        }
+
+    @property
+    def full(self) -> bool:
+        """Return True if the recording reached its maximum size."""
+        return len(self.records) >= MAX_RECORDS
+
+    def _snapshot(self) -> dict[str, Any]:
+        snapshot = {
+            "rssi": self._device.rssi,
+            "last_action_status": to_json(self._device.last_action_status),
+        }
+        if self._device.keyturner_state is not self._last_state:
+            self._last_state = self._device.keyturner_state
+            snapshot["state"] = to_json(self._last_state)
+        if self._device.config is not self._last_config:
+            self._last_config = self._device.config
+            snapshot["config"] = to_json(self._last_config)
+        return snapshot
+
+    def _record(self, kind: str, data: dict[str, Any], start: float = None) -> None:
+        if self.full:
+            return
+        offset = (start or time.monotonic()) - self._start
+        record = [round(offset, 4), kind, data]
+        self.records.append(record)
+        self.nbytes += deep_getsizeof(record)
+        if self.full:
+            _LOGGER.warning(
+                "Recording to %s reached %s records and is stopped", self.path, MAX_RECORDS
+            )
+            self.header["truncated"] = True
+            if self.on_full is not None:
+                self.on_full()
+
+    @callback
+    def async_record_advertisement(self, service_info, handling_time: float) -> None:
+        """Record an advertisement and the time it took to handle it."""
+        advertisement = service_info.advertisement
+        self._record(
+            RECORD_ADVERTISEMENT,
+            {
+                "name": service_info.name,
+                "rssi": service_info.rssi,
+                "source": service_info.source,
+                "manufacturer_data": {
+                    str(k): v.hex() for k, v in advertisement.manufacturer_data.items()
+                },
+                "cost": round(handling_time, 6),
+            },
+        )
+
+    @callback
+    def async_record_call(
+        self,
+        method: str,
+        args: tuple,
+        kwargs: dict[str, Any],
+        start: float,
+        result: Any = None,
+        error: Exception | None = None,
+    ) -> None:
+        """Record a NukiDevice call with its result and the resulting device state."""
+        # Never write the security PIN to disk.
+        kwargs = {k: v for k, v in kwargs.items() if k != "security_pin"}
+        if method == "update_nuki_time":
+            args = args[1:]
+        self._record(
+            RECORD_CALL,
+            {
+                "method": method,
+                "args": to_json(args),
+                "kwargs": to_json(kwargs),
+                "result": to_json(result),
+                "error": None if error is None else type(error).__name__,
+                "duration": round(time.monotonic() - start, 4),
+                "snapshot": self._snapshot(),
+            },
+            start,
+        )
+
+    @callback
+    def async_record_callback(self, command) -> None:
+        """Record a callback fired by NukiDevice."""
+        self._record(
+            RECORD_CALLBACK, {"command": to_json(command), "snapshot": self._snapshot()}
+        )
+
+    @callback
+    def async_record_entity_states(self) -> None:
+        """Record the entity states that changed since the last record."""
+        changed = {}
+        for entity_id, unique_id in self._entity_ids.items():
+            if (state := self.hass.states.get(entity_id)) is None:
+                continue
+            if self._last_states.get(unique_id) != state.state:
+                changed[unique_id] = self._last_states[unique_id] = state.state
+        if changed:
+            self._record(RECORD_STATES, changed)
+
+    def write(self) -> None:
+        """Write the recording as gzipped JSON lines. Runs in the executor."""
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            file.write(json.dumps(self.header, separators=(",", ":")) + "\n")
+            for record in self.records:
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def read_recording(path: str) -> tuple[dict[str, Any], list]:
+    """Read a recording written by NukiTrafficRecording. Runs in the executor."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        records = [json.loads(line) for line in file if line.strip()]
+    if header.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version {header.get('version')}")
+    return header, records
+
+
+class ReplayNukiDevice:
+    """Stand-in for NukiDevice that answers calls from a recording."""
+
+    def __init__(self, header: dict[str, Any], records: list) -> None:
+        """Initialize the replay device."""
+        self._address = header["address"]
+        self._device_type = from_json(header["device_type"])
+        self._calls: dict[str, deque] = defaultdict(deque)
+        for _, kind, data in records:
+            if kind == RECORD_CALL:
+                self._calls[data["method"]].append(data)
+        self._callbacks: list[Callable] = []
+        self._poll_needed = True
+        self.rssi = None
+        self.last_state = None
+        self.config = {}
+        self.last_action_status = None
+        self.apply_snapshot(header["snapshot"])
+
+    @property
+    def device_type(self):
+        """Return the recorded device type."""
+        return self._device_type
+
+    @property
+    def keyturner_state(self):
+        """Return the current keyturner state."""
+        return self.last_state
+
+    @property
+    def is_battery_critical(self):
+        """Return True if the battery is critical."""
+        return bool(self.last_state["critical_battery_state"] & 1)
+
+    @property
+    def is_battery_charging(self):
+        """Return True if the battery is charging."""
+        return bool(self.last_state["critical_battery_state"] & 2)
+
+    @property
+    def battery_percentage(self):
+        """Return the battery percentage."""
+        return ((self.last_state["critical_battery_state"] & 252) >> 2) * 2
+
+    def apply_snapshot(self, snapshot: dict[str, Any]) -> None:
+        """Apply a recorded device snapshot."""
+        self.rssi = snapshot.get("rssi", self.rssi)
+        self.last_action_status = from_json(snapshot.get("last_action_status"))
+        if "state" in snapshot:
+            self.last_state = from_json(snapshot["state"])
+        if "config" in snapshot:
+            self.config = from_json(snapshot["config"])
+
+    def subscribe(self, callback_: Callable) -> Callable[[], None]:
+        """Subscribe to replayed callbacks."""
+        self._callbacks.append(callback_)
+        return lambda: self._callbacks.remove(callback_)
+
+    def fire_callbacks(self, command) -> None:
+        """Fire a replayed callback."""
+        for callback_ in self._callbacks:
+            callback_(command)
+
+    def set_ble_device(self, ble_device=None) -> None:
+        """Ignore BLE device changes."""
+
+    def parse_advertisement_data(self, device, advertisement_data) -> None:
+        """Parse a replayed advertisement like NukiDevice does."""
+        manufacturer_data = advertisement_data.manufacturer_data.get(76)
+        if manufacturer_data is None or manufacturer_data[0] != 0x02:
+            return
+        self.rssi = advertisement_data.rssi
+        if not self.last_state or manufacturer_data[-1] & 0x1:
+            self._poll_needed = True
+
+    def poll_needed(self, seconds_since_last_poll=None) -> bool:
+        """Return True if the advertisements asked for a poll."""
+        return self._poll_needed
+
+    async def _replay_call(self, method: str) -> Any:
+        if not self._calls[method]:
+            _LOGGER.debug("Recording has no more %s calls", method)
+            return None
+        data = self._calls[method].popleft()
+        self.apply_snapshot(data["snapshot"])
+        if data["error"]:
+            raise ReplayError(f"Recorded {method} failed with {data['error']}")
+        return from_json(data["result"])
+
+    async def update_state(self):
+        """Replay a state update."""
+        self._poll_needed = False
+        return await self._replay_call("update_state")
+
+    async def update_config(self):
+        """Replay a config update."""
+        return await self._replay_call("update_config")
+
+    async def lock_action(self, *args, **kwargs):
+        """Replay a lock action."""
+        return await self._replay_call("lock_action")
+
+    async def request_log_entries(self, *args, **kwargs):
+        """Replay a log request."""
+        return await self._replay_call("request_log_entries") or []
+
+    async def update_nuki_time(self, *args, **kwargs):
+        """Replay a time update."""
+        return await self._replay_call("update_nuki_time")
+
+    async def disconnect(self):
+        """Replay a disconnect."""
+        return await self._replay_call("disconnect")
+
+
+class ReplayError(Exception):
+    """A replayed call failed in the recording."""
+
+
+def _replay_entities(coordinator) -> list:
+    """Build every stateful entity of a device, without adding them to hass."""
+    # Imported here, the platforms import the coordinator which imports this module.
+    from .binary_sensor import NukiBinarySensor, supported_sensors as supported_binary_sensors
+    from .lock import NukiLock, NukiOpener
+    from .sensor import NukiSensor, supported_sensors
+
+    device = coordinator.device
+    if device.device_type == NukiConst.NukiDeviceType.OPENER:
+        entities = [NukiOpener(coordinator)]
+    else:
+        entities = [NukiLock(coordinator)]
+    entities += [NukiBinarySensor(coordinator, desc) for desc in supported_binary_sensors(device)]
+    entities += [NukiSensor(coordinator, sensor) for sensor in supported_sensors(device)]
+    for entity in entities:
+        entity.hass = coordinator.hass
+        entity._async_update_attrs()
+    return entities
+
+
+def _entity_state(entity) -> str:
+    try:
+        state = entity.state
+    except Exception:  # unattached entities may miss what a state needs
+        return "unknown"
+    return "unknown" if state is None else str(state)
+
+
+class _CostStats:
+    """Count, mean and max of the handling time of one kind of event."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, cost: float) -> None:
+        self.count += 1
+        self.total += cost
+        self.max = max(self.max, cost)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+async def async_replay(
+    hass: HomeAssistant, path: str, speed: float = 0, max_mismatches: int = 50
+) -> dict[str, Any]:
+    """Replay a recording through a sandboxed coordinator and its entities.
+
+    ``speed`` is a multiple of real time, 0 replays as fast as possible. The
+    entity states produced by the replay are compared with the recorded ones.
+    """
+    # Imported here, the coordinator imports this module.
+    from .coordinator import NukiDataUpdateCoordinator
+
+    header, records = await hass.async_add_executor_job(read_recording, path)
+    device = ReplayNukiDevice(header, records)
+    coordinator = NukiDataUpdateCoordinator(
+        hass=hass,
+        logger=_LOGGER,
+        ble_device=SimpleNamespace(address=header["address"]),
+        device=device,
+        base_unique_id=f"replay-{header['address']}",
+        device_name="replay",
+        connectable=True,
+        security_pin=0 if header["logs_enabled"] else None,
+    )
+    coordinator.statistics.enabled = False
+    coordinator.fire_events = False
+    coordinator.failover = False
+    device.subscribe(coordinator._nuki_device_callback)
+    entities = _replay_entities(coordinator)
+    # Match entities by their unique id suffix, e.g. "-battery".
+    by_suffix = {
+        entity.unique_id.removeprefix(coordinator.base_unique_id): entity
+        for entity in entities
+    }
+
+    costs: dict[str, _CostStats] = defaultdict(_CostStats)
+    recorded_costs = _CostStats()
+    mismatches = []
+    compared = 0
+    started = time.monotonic()
+
+    for offset, kind, data in records:
+        if speed:
+            delay = offset / speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        event_start = time.perf_counter()
+        if kind == RECORD_ADVERTISEMENT:
+            recorded_costs.add(data["cost"])
+            advertisement = SimpleNamespace(
+                rssi=data["rssi"],
+                manufacturer_data={
+                    int(k): bytes.fromhex(v) for k, v in data["manufacturer_data"].items()
+                },
+            )
+            service_info = SimpleNamespace(
+                name=data["name"],
+                address=header["address"],
+                rssi=data["rssi"],
+                source=data["source"],
+                device=coordinator.ble_device,
+                advertisement=advertisement,
+            )
+            coordinator._async_handle_advertisement(service_info)
+            if coordinator._needs_poll(service_info, None):
+                try:
+                    await coordinator._async_update()
+                except ReplayError as ex:
+                    _LOGGER.debug(ex)
+        elif kind == RECORD_CALLBACK:
+            device.apply_snapshot(data["snapshot"])
+            device.fire_callbacks(from_json(data["command"]))
+        elif kind == RECORD_STATES:
+            for unique_id, expected in data.items():
+                # Entities of entries without a unique id are registered as
+                # "None-<key>".
+                entity = by_suffix.get(unique_id.removeprefix(str(header["unique_id"])))
+                if entity is None:
+                    continue
+                compared += 1
+                if (actual := _entity_state(entity)) != expected and len(
+                    mismatches
+                ) < max_mismatches:
+                    mismatches.append(
+                        {"t": offset, "entity": unique_id, "expected": expected, "actual": actual}
+                    )
+            continue
+        else:
+            continue
+        for entity in entities:
+            entity._async_update_attrs()
+        costs[kind].add(time.perf_counter() - event_start)
+
+    return {
+        "records": len(records),
+        "truncated": header.get("truncated", False),
+        "duration_s": round(time.monotonic() - started, 3),
+        "recorded_duration_s": records[-1][0] if records else 0,
+        "compared_states": compared,
+        "mismatches": mismatches,
+        "cost": {kind: stats.as_dict() for kind, stats in costs.items()},
+        "recorded_advertisement_cost": recorded_costs.as_dict(),
+    }
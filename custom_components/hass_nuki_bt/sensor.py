@@ -2,7 +2,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from collections.abc import Callable
-import datetime
 
 
 from homeassistant.components.sensor import (
@@ -16,11 +15,13 @@ from homeassistant.const import (
     PERCENTAGE,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from pyNukiBT import NukiConst
+from pyNukiBT import NukiConst, NukiDevice
 
 from .const import DOMAIN
 from .coordinator import NukiDataUpdateCoordinator
@@ -33,8 +34,13 @@ PARALLEL_UPDATES = 0
 class NukiSensorEntityDescription(SensorEntityDescription):
     """A class that describes nuki sensor entities."""
 
-    info_function: Callable | None = lambda slf: slf.device.keyturner_state[slf.sensor]
+    info_function: Callable | None = lambda slf: slf.coordinator.snapshot.state[slf.sensor]
     icon_function: Callable | None = None
+    attributes_function: Callable | None = None
+    # Stay available while the device is silent, to report on it.
+    available_when_stale: bool = False
+    # Whether the sensor applies to a device, None if it applies to all.
+    exists_function: Callable | None = None
 
 SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
     "name": NukiSensorEntityDescription(
@@ -43,7 +49,7 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         icon="mdi:lock",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.config.get(slf.sensor),
+        info_function=lambda slf: slf.coordinator.snapshot.config.get(slf.sensor),
     ),
     "rssi": NukiSensorEntityDescription(
         key="rssi",
@@ -52,7 +58,14 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         device_class=SensorDeviceClass.SIGNAL_STRENGTH,
         state_class=SensorStateClass.MEASUREMENT,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.rssi,
+        info_function=lambda slf: slf.device.rssi if slf.coordinator.rssi_per_advertisement \
+            else None if (mean := slf.coordinator.rssi_statistics.mean) is None else round(mean, 1),
+        attributes_function=lambda slf: None if slf.coordinator.rssi_per_advertisement else {
+            "min": (stats := slf.coordinator.rssi_statistics).min,
+            "max": stats.max,
+            "samples": stats.samples,
+            "interval": slf.coordinator.rssi_interval,
+        },
     ),
     "battery": NukiSensorEntityDescription(
         key="battery",
@@ -61,12 +74,12 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         device_class=SensorDeviceClass.BATTERY,
         state_class=SensorStateClass.MEASUREMENT,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: slf.device.battery_percentage,
+        info_function=lambda slf: slf.coordinator.snapshot.battery_percentage,
     ),
     "lock_state": NukiSensorEntityDescription(
         key="lock_state",
         name="Lock state",
-        icon_function=lambda slf:"mdi:lock" if int(slf.device.keyturner_state["lock_state"]) == 1 else "mdi:lock-open",
+        icon_function=lambda slf:"mdi:lock" if int(slf.coordinator.snapshot.state["lock_state"]) == 1 else "mdi:lock-open",
         device_class=SensorDeviceClass.ENUM,
     ),
     "door_sensor_state": NukiSensorEntityDescription(
@@ -74,6 +87,7 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         name="Door state",
         icon="mdi:door",
         device_class=SensorDeviceClass.ENUM,
+        exists_function=lambda device: device.device_type != NukiConst.NukiDeviceType.OPENER,
     ),
     "last_lock_action": NukiSensorEntityDescription(
         key="last_lock_action",
@@ -92,7 +106,7 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
     "last_lock_action_completion_status": NukiSensorEntityDescription(
         key="last_lock_action_completion_status",
         name="Last action completion status",
-        icon_function=lambda slf: "mdi:lock-check" if slf.device.keyturner_state['last_lock_action_completion_status'] == NukiConst.LockActionCompletionStatus.SUCCESS \
+        icon_function=lambda slf: "mdi:lock-check" if slf.coordinator.snapshot.state['last_lock_action_completion_status'] == NukiConst.LockActionCompletionStatus.SUCCESS \
             else "mdi:lock-alert",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -100,9 +114,9 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
     "last_nuki_command_status": NukiSensorEntityDescription(
         key="last_nuki_command_status",
         name="Last Nuki command status",
-        info_function=lambda slf: slf.device.last_action_status,
-        icon_function=lambda slf: "mdi:lock-check" if slf.device.last_action_status == NukiConst.StatusCode.COMPLETED \
-            or slf.device.last_action_status == NukiConst.StatusCode.ACCEPTED \
+        info_function=lambda slf: slf.coordinator.snapshot.last_action_status,
+        icon_function=lambda slf: "mdi:lock-check" if slf.coordinator.snapshot.last_action_status \
+            in (NukiConst.StatusCode.COMPLETED, NukiConst.StatusCode.ACCEPTED) \
                 else "mdi:lock-alert",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
@@ -120,18 +134,14 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         icon="mdi:account-lock",
         device_class=SensorDeviceClass.ENUM,
         entity_category=EntityCategory.DIAGNOSTIC,
-        # There is no user name if last action was triggered by button/manual etc.
-        info_function=lambda slf: name if (name := slf.coordinator.last_nuki_log_entry.get("name")) else \
-            trigger if ((data:=slf.coordinator.last_nuki_log_entry.get("data")) and (trigger := data.get("trigger"))) \
-            else "Unknown",
+        info_function=lambda slf: slf.coordinator.snapshot.last_action_user,
     ),
     "last_log_timestamp": NukiSensorEntityDescription(
         key="last_log_timestamp",
         name="Last log timestamp",
         device_class=SensorDeviceClass.TIMESTAMP,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: ts.replace(tzinfo=datetime.timezone(datetime.timedelta(minutes=slf.device.keyturner_state['timezone_offset']))) \
-             if (ts := slf.coordinator.last_nuki_log_entry.get("timestamp")) else None,
+        info_function=lambda slf: slf.coordinator.snapshot.log_timestamp,
         entity_registry_enabled_default=False,
     ),
     "last_state_timestamp": NukiSensorEntityDescription(
@@ -139,8 +149,100 @@ SENSOR_TYPES: dict[str, NukiSensorEntityDescription] = {
         name="Last state timestamp",
         device_class=SensorDeviceClass.TIMESTAMP,
         entity_category=EntityCategory.DIAGNOSTIC,
-        info_function=lambda slf: ks['current_time'].replace(tzinfo=datetime.timezone(datetime.timedelta(minutes=ks['timezone_offset']))) \
-            if (ks := slf.device.keyturner_state) else None,
+        info_function=lambda slf: slf.coordinator.snapshot.state_timestamp,
+        entity_registry_enabled_default=False,
+    ),
+    "connections_per_operation": NukiSensorEntityDescription(
+        key="connections_per_operation",
+        name="BLE connections per operation",
+        icon="mdi:bluetooth-connect",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: slf.coordinator.session_stats.connections_per_operation,
+        attributes_function=lambda slf: {
+            "sessions": (stats := slf.coordinator.session_stats).sessions,
+            "operations": stats.operations,
+            "connections": stats.connections,
+            "key_setup_ms": None if stats.key_setup_time is None else round(stats.key_setup_time * 1000, 3),
+            "key_derive_ms": None if stats.key_derive_time is None else round(stats.key_derive_time * 1000, 3),
+            "key_cache_hit": stats.key_cache_hit,
+            "prefetches": stats.prefetches,
+            "failovers": stats.failovers,
+            "failover_successes": stats.failover_successes,
+            "failover_resends_skipped": stats.failover_resends_skipped,
+            "failover_ms": round(stats.failover_time * 1000, 3),
+        },
+        entity_registry_enabled_default=False,
+    ),
+    "staleness": NukiSensorEntityDescription(
+        key="staleness",
+        name="Staleness",
+        icon="mdi:timer-sand",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: None if (staleness := slf.coordinator.staleness) is None \
+            else round(staleness),
+        attributes_function=lambda slf: {
+            "stale": slf.coordinator.stale,
+            "stale_after": slf.coordinator.stale_after,
+            "unavailable_after": slf.coordinator.unavailable_after,
+        },
+        available_when_stale=True,
+        entity_registry_enabled_default=False,
+    ),
+    "loop_time": NukiSensorEntityDescription(
+        key="loop_time",
+        name="Event loop time",
+        icon="mdi:timer-cog-outline",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: round(slf.coordinator.resources.loop_time * 1000, 1),
+        attributes_function=lambda slf: {
+            "callbacks": slf.coordinator.resources.callbacks,
+        },
+        available_when_stale=True,
+        entity_registry_enabled_default=False,
+    ),
+    "state_writes": NukiSensorEntityDescription(
+        key="state_writes",
+        name="State writes",
+        icon="mdi:database-edit-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: slf.coordinator.resources.state_writes,
+        available_when_stale=True,
+        entity_registry_enabled_default=False,
+    ),
+    "memory": NukiSensorEntityDescription(
+        key="memory",
+        name="Memory",
+        icon="mdi:memory",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: sum(slf.coordinator.memory_usage().values()),
+        attributes_function=lambda slf: slf.coordinator.memory_usage(),
+        available_when_stale=True,
+        entity_registry_enabled_default=False,
+    ),
+    "ble_time": NukiSensorEntityDescription(
+        key="ble_time",
+        name="BLE time",
+        icon="mdi:bluetooth-transfer",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        info_function=lambda slf: round(slf.coordinator.resources.ble_time, 1),
+        attributes_function=lambda slf: {
+            "calls": slf.coordinator.resources.ble_calls,
+        },
+        available_when_stale=True,
         entity_registry_enabled_default=False,
     ),
 }
@@ -150,10 +252,19 @@ async def async_setup_entry(
 ) -> None:
     """Set up Nuki sensor based on a config entry."""
     coordinator: NukiDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities = [NukiSensor(coordinator, sensor) for sensor in SENSOR_TYPES]
+    entities = [NukiSensor(coordinator, sensor) for sensor in supported_sensors(coordinator.device)]
     async_add_entities(entities)
 
 
+def supported_sensors(device: NukiDevice) -> list[str]:
+    """Return the sensors that apply to a device."""
+    return [
+        sensor
+        for sensor, description in SENSOR_TYPES.items()
+        if description.exists_function is None or description.exists_function(device)
+    ]
+
+
 class NukiSensor(NukiEntity, SensorEntity):
     """Representation of a Nuki sensor."""
 
@@ -164,10 +275,18 @@ class NukiSensor(NukiEntity, SensorEntity):
         self._attr_unique_id = f"{coordinator.base_unique_id}-{sensor}"
         self.entity_description = SENSOR_TYPES[sensor]
         self._info_function = self.entity_description.info_function
-        self._async_update_attrs()
+
+    @property
+    def available(self) -> bool:
+        """Return True if entity is available."""
+        if self.entity_description.available_when_stale:
+            return self.coordinator.available
+        return super().available
 
     def _async_update_attrs(self) -> None:
         """Update the entity attributes."""
         self._attr_native_value = self.entity_description.info_function(self)
         if self.entity_description.icon_function:
             self._attr_icon = self.entity_description.icon_function(self)
+        if self.entity_description.attributes_function:
+            self._attr_extra_state_attributes = self.entity_description.attributes_function(self)
@@ -0,0 +1,188 @@
+"""Domain services for hass_nuki_bt."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+import voluptuous as vol
+from bleak import BleakError
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from pyNukiBT import NukiConst, NukiErrorException, NukiLockConst, NukiOpenerConst
+
+from .const import DOMAIN
+from .coordinator import NukiDataUpdateCoordinator
+from .recording import async_replay
+
+_LOGGER = logging.getLogger(__name__)
+
+REPLAY_RECORDING_SERVICE_NAME = "replay_recording"
+REPLAY_RECORDING_SCHEMA = vol.Schema(
+    {
+        vol.Required("path"): cv.string,
+        vol.Optional("speed", default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+RESOURCE_SUMMARY_SERVICE_NAME = "resource_summary"
+
+LOCK_ALL_SERVICE_NAME = "lock_all"
+LOCK_ALL_ACTIONS = ("lock", "unlock")
+# Most adapters and proxies handle only a few concurrent connections.
+DEFAULT_PARALLEL_PER_ADAPTER = 2
+LOCK_ALL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional("action", default="lock"): vol.In(LOCK_ALL_ACTIONS),
+        vol.Optional("parallel_per_adapter", default=DEFAULT_PARALLEL_PER_ADAPTER): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10)
+        ),
+    }
+)
+
+
+def _device_action(coordinator: NukiDataUpdateCoordinator, action: str):
+    """Return the device specific lock action of a lock_all action."""
+    if coordinator.device.device_type == NukiConst.NukiDeviceType.OPENER:
+        if action == "lock":
+            return NukiOpenerConst.LockAction.DEACTIVATE_RTO
+        return NukiOpenerConst.LockAction.ACTIVATE_RTO
+    if action == "lock":
+        return NukiLockConst.LockAction.LOCK
+    return NukiLockConst.LockAction.UNLOCK
+
+
+def _target_coordinators(
+    hass: HomeAssistant, entity_ids: list[str] | None
+) -> dict[str, NukiDataUpdateCoordinator]:
+    """Return the coordinators of the targeted entities, or all of them."""
+    coordinators: dict[str, NukiDataUpdateCoordinator] = hass.data.get(DOMAIN, {})
+    if not entity_ids:
+        return dict(coordinators)
+    registry = er.async_get(hass)
+    targets = {}
+    for entity_id in entity_ids:
+        entry = registry.async_get(entity_id)
+        if entry is None or entry.config_entry_id not in coordinators:
+            raise ServiceValidationError(f"{entity_id} is not a Nuki BT entity.")
+        targets[entry.config_entry_id] = coordinators[entry.config_entry_id]
+    return targets
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the domain services."""
+
+    async def async_handle_replay_recording(call: ServiceCall) -> dict:
+        """Replay a recording and report the entity state differences and costs."""
+        path = call.data["path"]
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Reading {path} is not allowed.")
+        return await async_replay(hass, path, call.data["speed"])
+
+    async def async_handle_resource_summary(call: ServiceCall) -> dict:
+        """Report the host resources used by every device, most loop time first."""
+        coordinators: dict[str, NukiDataUpdateCoordinator] = hass.data.get(DOMAIN, {})
+        devices = {}
+        for entry_id, coordinator in sorted(
+            coordinators.items(), key=lambda item: -item[1].resources.loop_time
+        ):
+            memory = coordinator.memory_usage()
+            devices[entry_id] = {
+                "name": coordinator.device_name,
+                "address": coordinator.address,
+                **coordinator.resources.as_dict(),
+                "memory_bytes": sum(memory.values()),
+                "memory": memory,
+            }
+        return {
+            "loop_time_ms": round(sum(d["loop_time_ms"] for d in devices.values()), 3),
+            "state_writes": sum(d["state_writes"] for d in devices.values()),
+            "memory_bytes": sum(d["memory_bytes"] for d in devices.values()),
+            "ble_time_s": round(sum(d["ble_time_s"] for d in devices.values()), 3),
+            "devices": devices,
+        }
+
+    async def async_handle_lock_all(call: ServiceCall) -> dict:
+        """Send a lock action to many devices concurrently.
+
+        Devices are grouped by the adapter or proxy they were last heard on and
+        each adapter runs at most parallel_per_adapter actions at a time.
+        """
+        targets = _target_coordinators(hass, call.data.get(ATTR_ENTITY_ID))
+        user = None
+        if call.context.user_id:
+            user = await hass.auth.async_get_user(call.context.user_id)
+        user_name = user.name if user else None
+        semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(call.data["parallel_per_adapter"])
+        )
+        start = time.monotonic()
+
+        async def _async_lock_action(coordinator: NukiDataUpdateCoordinator) -> dict:
+            source = coordinator.source or "unknown"
+            async with semaphores[source]:
+                action_start = time.monotonic()
+                result = {
+                    "name": coordinator.device_name,
+                    "address": coordinator.address,
+                    "source": source,
+                    "queued_s": round(action_start - start, 3),
+                }
+                try:
+                    msg = await coordinator.async_lock_action(
+                        _device_action(coordinator, call.data["action"]),
+                        name_suffix=user_name,
+                    )
+                except (BleakError, asyncio.TimeoutError, NukiErrorException) as ex:
+                    result["success"] = False
+                    result["error"] = str(ex) or type(ex).__name__
+                except Exception as ex:  # keep the results of the other devices
+                    _LOGGER.exception("%s: lock_all action failed", coordinator.address)
+                    result["success"] = False
+                    result["error"] = str(ex) or type(ex).__name__
+                else:
+                    result["success"] = msg.status in (
+                        NukiConst.StatusCode.COMPLETED,
+                        NukiConst.StatusCode.ACCEPTED,
+                    )
+                    result["status"] = str(msg.status)
+                coordinator.async_update_listeners()
+                result["duration_s"] = round(time.monotonic() - action_start, 3)
+                return result
+
+        results = await asyncio.gather(
+            *(_async_lock_action(coordinator) for coordinator in targets.values())
+        )
+        return {
+            "duration_s": round(time.monotonic() - start, 3),
+            "success": all(result["success"] for result in results),
+            "devices": dict(zip(targets, results)),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        REPLAY_RECORDING_SERVICE_NAME,
+        async_handle_replay_recording,
+        schema=REPLAY_RECORDING_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        RESOURCE_SUMMARY_SERVICE_NAME,
+        async_handle_resource_summary,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        LOCK_ALL_SERVICE_NAME,
+        async_handle_lock_all,
+        schema=LOCK_ALL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
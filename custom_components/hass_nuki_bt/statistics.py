@@ -0,0 +1,274 @@
+"""Long-term statistics for hass_nuki_bt."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import PERCENTAGE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STATISTIC_BATTERY = "battery"
+STATISTIC_LOCK = "lock_events"
+STATISTIC_UNLOCK = "unlock_events"
+STATISTIC_KEYPAD = "keypad_events"
+STATISTIC_DOOR = "door_events"
+EVENT_STATISTICS = {
+    STATISTIC_LOCK: "lock events",
+    STATISTIC_UNLOCK: "unlock events",
+    STATISTIC_KEYPAD: "keypad events",
+    STATISTIC_DOOR: "door open events",
+}
+
+HOURS_PER_WEEK = 7 * 24
+# Weight left of an event after each week, so the histogram follows changed habits.
+ACTIVITY_WEEKLY_DECAY = 0.8
+# Weighted events an hour of the week needs to count as an activity window.
+ACTIVITY_THRESHOLD = 1.5
+ACTIVITY_SAVE_DELAY = 300
+
+
+def deep_getsizeof(*objs) -> int:
+    """Return the memory held by objects and the containers and slots within them."""
+    seen: set[int] = set()
+    size = 0
+    stack = list(objs)
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            stack.extend(obj)
+        elif hasattr(obj, "__slots__"):
+            stack.extend(getattr(obj, slot, None) for slot in obj.__slots__)
+    return size
+
+
+class WindowStatistics:
+    """Incremental min/mean/max of the samples seen in one window."""
+
+    __slots__ = ("samples", "mean", "min", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty window."""
+        self.samples = 0
+        self.mean: float | None = None
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def add(self, value: float) -> None:
+        """Add one sample to the window."""
+        self.samples += 1
+        if self.samples == 1:
+            self.mean = self.min = self.max = value
+            return
+        self.mean += (value - self.mean) / self.samples
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+
+class NukiLongTermStatistics:
+    """Hourly battery and access event statistics of one Nuki device.
+
+    Samples are aggregated in memory for the current hour and written to the
+    recorder as external statistics once the hour is over, so months of
+    history cost one row per statistic and hour instead of one state per event.
+    """
+
+    def __init__(self, hass: HomeAssistant, base_unique_id: str, name: str) -> None:
+        """Initialize the statistics."""
+        self.hass = hass
+        self._name = name
+        self._prefix = f"{DOMAIN}:{base_unique_id.lower()}"
+        self._hour: datetime | None = None
+        self._battery = WindowStatistics()
+        self._events = dict.fromkeys(EVENT_STATISTICS, 0)
+        self._sums: dict[str, float] | None = None
+        self._import_lock = asyncio.Lock()
+        self.enabled = True
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the statistics of the current hour."""
+        return deep_getsizeof(self._battery, self._events, self._sums)
+
+    def statistic_id(self, statistic: str) -> str:
+        """Return the external statistic id of a statistic."""
+        return f"{self._prefix}_{statistic}"
+
+    @callback
+    def async_add_battery(self, percentage: int) -> None:
+        """Add a battery level sample."""
+        self._async_roll_hour()
+        self._battery.add(percentage)
+
+    @callback
+    def async_add_event(self, statistic: str) -> None:
+        """Count one access event."""
+        self._async_roll_hour()
+        self._events[statistic] += 1
+
+    @callback
+    def async_flush(self, now: datetime | None = None) -> None:
+        """Write the statistics of a completed hour, if any."""
+        if self._hour is not None and dt_util.utcnow() >= self._hour + timedelta(hours=1):
+            self._async_write_hour()
+
+    @callback
+    def _async_roll_hour(self) -> None:
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if self._hour is not None and hour != self._hour:
+            self._async_write_hour()
+        self._hour = hour
+
+    @callback
+    def _async_write_hour(self) -> None:
+        hour, battery, events = self._hour, self._battery, self._events
+        self._hour = None
+        self._battery = WindowStatistics()
+        self._events = dict.fromkeys(EVENT_STATISTICS, 0)
+        if not self.enabled or "recorder" not in self.hass.config.components:
+            return
+        self.hass.async_create_task(self._async_import(hour, battery, events))
+
+    async def _async_import(
+        self, hour: datetime, battery: WindowStatistics, events: dict[str, int]
+    ) -> None:
+        async with self._import_lock:
+            await self._async_import_hour(hour, battery, events)
+
+    async def _async_import_hour(
+        self, hour: datetime, battery: WindowStatistics, events: dict[str, int]
+    ) -> None:
+        if battery.samples:
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=True,
+                    has_sum=False,
+                    name=f"{self._name} battery",
+                    source=DOMAIN,
+                    statistic_id=self.statistic_id(STATISTIC_BATTERY),
+                    unit_of_measurement=PERCENTAGE,
+                ),
+                [
+                    StatisticData(
+                        start=hour, mean=battery.mean, min=battery.min, max=battery.max
+                    )
+                ],
+            )
+        if not any(events.values()):
+            return
+        if self._sums is None:
+            self._sums = await self._async_load_sums()
+        for statistic, count in events.items():
+            if not count:
+                continue
+            self._sums[statistic] += count
+            async_add_external_statistics(
+                self.hass,
+                StatisticMetaData(
+                    has_mean=False,
+                    has_sum=True,
+                    name=f"{self._name} {EVENT_STATISTICS[statistic]}",
+                    source=DOMAIN,
+                    statistic_id=self.statistic_id(statistic),
+                    unit_of_measurement=None,
+                ),
+                [StatisticData(start=hour, state=count, sum=self._sums[statistic])],
+            )
+
+    async def _async_load_sums(self) -> dict[str, float]:
+        """Load the running totals of the event statistics from the recorder."""
+        sums = {}
+        for statistic in EVENT_STATISTICS:
+            statistic_id = self.statistic_id(statistic)
+            last = await get_instance(self.hass).async_add_executor_job(
+                get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+            )
+            sums[statistic] = (
+                last[statistic_id][0]["sum"] or 0 if last.get(statistic_id) else 0
+            )
+        return sums
+
+
+def _activity_store(hass: HomeAssistant, entry_id: str) -> Store:
+    return Store(hass, 1, f"{DOMAIN}_activity_{entry_id}")
+
+
+async def async_remove_activity(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored activity histogram of an entry."""
+    await _activity_store(hass, entry_id).async_remove()
+
+
+class ActivityHistogram:
+    """Decaying hour-of-week histogram of the lock and unlock events of a device."""
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = [0.0] * HOURS_PER_WEEK
+        self._week: int | None = None
+        self._store: Store | None = None
+
+    async def async_load(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Load the histogram of an entry and save it from now on."""
+        self._store = _activity_store(hass, entry_id)
+        if data := await self._store.async_load():
+            self.counts = data["counts"]
+            self._week = data["week"]
+
+    @callback
+    def async_add(self, when: datetime) -> None:
+        """Count one event."""
+        self._decay(when)
+        self.counts[self._hour_of_week(when)] += 1
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, ACTIVITY_SAVE_DELAY)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the histogram."""
+        return deep_getsizeof(self.counts)
+
+    @property
+    def learned(self) -> bool:
+        """Return True once there is enough history for predictions."""
+        return sum(self.counts) >= ACTIVITY_THRESHOLD * 2
+
+    def likely(self, when: datetime) -> bool:
+        """Return True if activity is likely in the hour of when."""
+        self._decay(when)
+        return self.counts[self._hour_of_week(when)] >= ACTIVITY_THRESHOLD
+
+    def _decay(self, when: datetime) -> None:
+        week = int(when.timestamp() // (HOURS_PER_WEEK * 3600))
+        if self._week is not None and week > self._week:
+            factor = ACTIVITY_WEEKLY_DECAY ** (week - self._week)
+            self.counts = [count * factor for count in self.counts]
+        self._week = week
+
+    @staticmethod
+    def _hour_of_week(when: datetime) -> int:
+        local = dt_util.as_local(when)
+        return local.weekday() * 24 + local.hour
+
+    def _data_to_save(self) -> dict:
+        return {"counts": self.counts, "week": self._week}